@@ -0,0 +1,155 @@
+"""
+Benchmark of the batched manager assignment of Bari.
+
+Bari assigns the manager of each chain greedily, right after its placement
+(`Bari.place_manager`). With its `batch` option the managers of a batch of
+chains are assigned together with bounded-depth augmenting paths
+(`jsd_mp.bari.assignment.ManagerAssignment`). This script runs both on the
+same random chain sets and reports, per configuration and load, the mean
+acceptance, the licenses per accepted chain and the solve time.
+
+The chains are generated like in `sensitivity_sweep.py` (chainer style) and
+each (greedy, batch) pair runs with the same seed.
+
+Usage (from the repository root):
+
+    uv run python analysis/flow_benchmark.py --runs 5 --batches 10 50
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from jsd_mp.config import load, Config
+from jsd_mp.domain import Chain, Link, VNFM
+from jsd_mp.bari import Bari
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+
+MANAGEABLE = ["vFW", "vNAT", "vIDS", "vDPI"]
+CHAIN_FEE = 100
+CHAIN_BW = 250
+
+
+def make_chains(n, types, rng):
+    """n random chains: ingress, 2 to 4 manageable functions and egress."""
+    chains = []
+    for i in range(n):
+        length = rng.randint(4, 6)
+        chain = Chain(name=f"ch-{i}", fee=CHAIN_FEE)
+        chain.add_function(types["ingress"])
+        for _ in range(length - 2):
+            chain.add_function(types[rng.choice(MANAGEABLE)])
+        chain.add_function(types["egress"])
+        for s in range(len(chain.functions) - 1):
+            chain.add_link(s, s + 1, Link(CHAIN_BW))
+        chains.append(chain)
+    return chains
+
+
+def run_once(cfg, seed, batch):
+    random.seed(seed)
+    solver = Bari(cfg)
+    solver.seed = seed
+    solver.batch = batch
+    start = time.perf_counter()
+    solver.solve()
+    elapsed = time.perf_counter() - start
+    return len(solver.solution), solver.licenses, elapsed
+
+
+def benchmark(name, base, loads, batches, runs, capacity=None):
+    vnfm = base.vnfm
+    if capacity is not None:
+        vnfm = VNFM(
+            cores=vnfm.cores,
+            memory=vnfm.memory,
+            capacity=capacity,
+            radius=vnfm.radius,
+            bandwidth=vnfm.bandwidth,
+            license_cost=vnfm.license_cost,
+        )
+
+    rows = []
+    for n in loads:
+        results = {batch: [] for batch in [0] + batches}
+        for r in range(runs):
+            chains = make_chains(n, base.types, random.Random(1000 + r))
+            cfg = Config(base.types, chains, vnfm, base.topology)
+            for batch in results:
+                results[batch].append(run_once(cfg, r, batch))
+
+        for batch, samples in results.items():
+            accepted = [a for a, _, _ in samples]
+            licenses = [lic for _, lic, _ in samples]
+            rows.append(
+                dict(
+                    config=name,
+                    capacity=vnfm.capacity,
+                    load=n,
+                    mode="greedy" if batch == 0 else f"batch={batch}",
+                    accepted=statistics.mean(accepted) / n * 100,
+                    licenses=statistics.mean(licenses),
+                    per_chain=statistics.mean(
+                        lic / a if a else 0.0 for a, lic in zip(accepted, licenses)
+                    ),
+                    time=statistics.mean(t for _, _, t in samples),
+                )
+            )
+            print(
+                f"  {name} cap={vnfm.capacity} n={n:3d} {rows[-1]['mode']:9s}: "
+                f"accepted={rows[-1]['accepted']:5.1f}% "
+                f"licenses={rows[-1]['licenses']:6.1f} "
+                f"({rows[-1]['per_chain']:.3f}/chain) "
+                f"time={rows[-1]['time']:.2f}s"
+            )
+    return rows
+
+
+def markdown(rows):
+    lines = [
+        "| config | capacity | load | mode | accepted (%) | licenses "
+        "| licenses / chain | time (s) |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['config']} | {row['capacity']} | {row['load']} "
+            f"| {row['mode']} | {row['accepted']:.1f} | {row['licenses']:.1f} "
+            f"| {row['per_chain']:.3f} | {row['time']:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--batches", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--loads", type=int, nargs="+", default=[20, 60])
+    parser.add_argument(
+        "--capacities", type=int, nargs="+", default=[None, 4]
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for name in ("config_example", "results/config-fattree-k-6"):
+        base = load(os.path.join(ROOT, name))
+        base.topology.compile()
+        for capacity in args.capacities:
+            rows += benchmark(
+                os.path.basename(name),
+                base,
+                args.loads,
+                args.batches,
+                args.runs,
+                capacity,
+            )
+
+    print()
+    print(markdown(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -37,9 +37,10 @@ Experiments
 Outputs (next to this file): sweep_constraint.{csv,png},
 sweep_capacity.{csv,png}, SWEEP.md
 """
+import math
 import os
-import copy
 import random
+import dataclasses
 import argparse
 
 import numpy as np
@@ -52,7 +53,8 @@ import matplotlib.pyplot as plt
 HERE = os.path.dirname(os.path.abspath(__file__))
 # jsd_mp is installed as a package (uv sync); run via `uv run python ...`.
 from jsd_mp.config import load, Config
-from jsd_mp.domain import Chain, Link, VNFM
+from jsd_mp.domain import Chain, Link, VNFM, Topology
+from jsd_mp.domain.index import bits
 from jsd_mp.bari import Bari
 
 MANAGEABLE = ["vFW", "vNAT", "vIDS", "vDPI"]
@@ -67,8 +69,24 @@ class Disjoint(Bari):
     def get_cost(self, topology, previous, current, fn, link):
         if previous == "" or link is None:
             return 0
-        path = topology.path(previous, current, 0)
-        return int(float("inf")) if path is None else len(path)
+        hops = topology.hop_distance(previous, current)
+        if hops is None:
+            return math.inf
+        return hops
+
+    def get_costs(self, topology, previous, candidates, fn, link):
+        index = topology.index
+        if previous == "" or link is None:
+            return {j: 0 for j in bits(candidates)}
+        k = index.ids[previous]
+        costs = {}
+        for j in bits(candidates):
+            hops = index.hops[k * len(index) + j]
+            # the -1 sentinel marks an unreachable candidate
+            if hops == -1:
+                continue
+            costs[j] = hops
+        return costs
 
 
 def make_chains(n, types, rng):
@@ -98,10 +116,15 @@ def build_cfg(base, chains, *, radius=None, capacity=None, strip_management=Fals
         radius=radius if radius is not None else v.radius,
         bandwidth=v.bandwidth, license_cost=v.license_cost,
     )
-    topo = copy.deepcopy(base.topology)
+    topo = base.topology
     if strip_management:
-        for node in topo.nodes.values():
-            object.__setattr__(node, "not_manager_nodes", [])  # Node is frozen
+        # the constraint is compiled into the topology's index, so build a
+        # fresh topology without it rather than editing the (frozen) nodes.
+        topo = Topology()
+        for name, node in base.topology.nodes.items():
+            topo.add_node(name, dataclasses.replace(node, not_manager_nodes=[]))
+        for (source, destination), link in base.topology.links.items():
+            topo.add_link(source, destination, link)
     return Config(base.types, chains, vnfm, topo)
 
 
@@ -1,8 +1,10 @@
 import typing
-import random
+import math
+import time
 import itertools
 
 from jsd_mp.bari import Bari
+from jsd_mp.config import Config
 from jsd_mp.domain import (
     Placement,
     ManagementPlacement,
@@ -10,6 +12,9 @@ from jsd_mp.domain import (
     Topology,
     Node,
 )
+from jsd_mp.domain.index import bits
+from jsd_mp.solver import Solver
+from jsd_mp.solver.multistart import multistart
 
 
 class Abu(Bari):
@@ -29,6 +34,24 @@ class Abu(Bari):
     # the precentage of nodes that we are
     # going to reserve VNFM resource on them
     reserve_percentage: int = 100
+    # the number of iterations that a chain cannot go back to
+    # the manager that it is moved from
+    tenure: int = 7
+    # the number of chains whose moves are evaluated in each iteration,
+    # 0 means all of the chains
+    candidates: int = 0
+    # the number of iterations without an improvement before stopping
+    patience: int = 100
+    # the number of the tabu searches from the placement, see `multistart`
+    starts: int = 1
+
+    def __init__(
+        self, config: Config, parent: typing.Union[Solver, None] = None
+    ):
+        super().__init__(config, parent)
+        # counters of the tabu search, see `iterations` too
+        self.moves: int = 0
+        self.search_time: float = 0.0
 
     def _solve(
         self,
@@ -48,7 +71,7 @@ class Abu(Bari):
                 or node.memory <= self.vnfm.memory
             ):
                 continue
-            if random.randint(1, 100) > self.reserve_percentage:
+            if self.rng.randint(1, 100) > self.reserve_percentage:
                 continue
             reserved_nodes.append(_id)
             self.topology.update_node(
@@ -65,7 +88,11 @@ class Abu(Bari):
         # place chains with Bari algorithm.
         # The Bari algorithm is the parent of Abu algorithm
         # and we call its place method.
+        # the placed chains get their managers even if the deadline expires.
         for chain in self.chains:
+            if self.expired():
+                break
+            self.considered += 1
             self.logger.info("Placement of %s started", chain.name)
 
             placement = self.place(chain)
@@ -108,15 +135,7 @@ class Abu(Bari):
                 placement.chain, self.topology, placement
             )
             if manager_placement is not None:
-                self.manage_by_node[
-                    manager_placement.management_node
-                ] = self.manage_by_node.get(
-                    manager_placement.management_node, 0
-                ) + sum(
-                    placement.chain.manageable_functions
-                )
-
-                manager_placement.apply_on_topology(self.topology)
+                self.apply_management(manager_placement)
                 actual_placements.append((placement, manager_placement))
             else:
                 placement.revert_on_topology(self.topology)
@@ -125,68 +144,149 @@ class Abu(Bari):
                     placement.chain.name,
                 )
 
-        # in each iteration we try to improve the manager placement
-        # based on tabu search. in each iteration we do the following:
-        # - randomly switch chains between vnfms
-        for _ in range(self.n_iter):
-            current_cost = self.cost
-
-            # randomly switch chains between vnfms
-            index = random.randint(0, len(actual_placements) - 1)
-            p, mp = actual_placements[index]
-
-            # each node can be a manager if it has the required resources
-            # here we are going to choose a new vnfm for randomly
-            # selected chain
-            vnfm = random.choice(
-                list(set(self.topology.nodes) - set(mp.management_node))
-            )
+        return multistart(self, actual_placements, self.starts, self.workers)
+
+    def improve(
+        self,
+        placements: typing.List[typing.Tuple[Placement, ManagementPlacement]],
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        improve the manager placement with a tabu search. A move reassigns
+        a chain to another eligible manager and the moves of an iteration
+        are evaluated together with the license deltas of their managers,
+        so only the selected move is applied on the topology.
+
+        Moving a chain back to a manager that it has left in the last
+        `tenure` iterations is tabu, unless it leads to fewer licenses than
+        the best assignment so far (aspiration). The search stops after
+        `patience` iterations without an improvement and the best
+        assignment is restored at the end.
+        """
+        placements = list(placements)
+        # the managed nodes of each chain
+        managed = [
+            list(itertools.compress(p.nodes, p.chain.manageable_functions))
+            for p, _ in placements
+        ]
+        # the fewest licenses that can manage all of the nodes
+        bound = math.ceil(sum(map(len, managed)) / self.vnfm.capacity)
 
-            # revert the current manager placement if it exists
-            self.revert_management(mp)
+        # (chain, manager) -> the last iteration that the move is tabu
+        tabu: typing.Dict[typing.Tuple[int, str], int] = {}
+        best_licenses = self.licenses
+        best = [mp for _, mp in placements]
+        improved = 0
 
-            # find new manager placement
-            manageable_functions = list(
-                itertools.compress(p.nodes, p.chain.manageable_functions)
+        start = time.perf_counter()
+        for iteration in range(self.n_iter):
+            if best_licenses <= bound or iteration - improved > self.patience:
+                break
+            if self.expired():
+                break
+
+            move = self.select_move(
+                placements, managed, tabu, iteration, best_licenses
             )
-            if self.is_management_resource_available(
-                self.topology, vnfm, manageable_functions
-            ):
-                paths = []
-                for n in manageable_functions:
-                    path = self.topology.path(vnfm, n, self.vnfm.bandwidth)
-                    if path is not None:
-                        paths.append(path)
-                new_mp = ManagementPlacement(p.chain, self.vnfm, vnfm, paths)
-
-                # apply new manager placement
-                self.apply_management(new_mp)
-
-                if self.cost > current_cost:
-                    self.revert_management(new_mp)
-                    self.apply_management(mp)
-                else:
-                    # update the placement
-                    actual_placements[index] = (
-                        p,
-                        new_mp,
-                    )
-            else:
-                self.apply_management(mp)
+            if move is None:
+                break
+            i, manager = move
+
+            p, mp = placements[i]
+            placements[i] = (p, self.reassign(p, mp, manager, managed[i]))
 
-        return actual_placements
+            tabu[(i, mp.management_node)] = iteration + self.tenure
+            self.iterations += 1
+            self.moves += 1
 
-    def apply_management(self, mp: ManagementPlacement):
-        mp.apply_on_topology(self.topology)
-        self.manage_by_node[mp.management_node] = self.manage_by_node.get(
-            mp.management_node, 0
-        ) + len(mp.management_links)
+            if self.licenses < best_licenses:
+                best_licenses = self.licenses
+                best = [mp for _, mp in placements]
+                improved = iteration
 
-    def revert_management(self, mp: ManagementPlacement):
-        mp.revert_on_topology(self.topology)
-        self.manage_by_node[mp.management_node] = self.manage_by_node.get(
-            mp.management_node, 0
-        ) - len(mp.management_links)
+        # restore the best assignment, all of the changed managements are
+        # reverted first so the best ones are applied on their own topology.
+        changed = [
+            i for i, (_, mp) in enumerate(placements) if mp is not best[i]
+        ]
+        for i in changed:
+            self.revert_management(placements[i][1])
+        for i in changed:
+            self.apply_management(best[i])
+            placements[i] = (placements[i][0], best[i])
+        self.moves += len(changed)
+
+        self.search_time += time.perf_counter() - start
+        self.logger.info(
+            "tabu search: %d iterations (%.0f per second) and %d moves",
+            self.iterations,
+            self.iteration_rate,
+            self.moves,
+        )
+
+        return placements
+
+    def select_move(
+        self,
+        placements: typing.List[typing.Tuple[Placement, ManagementPlacement]],
+        managed: typing.List[typing.List[str]],
+        tabu: typing.Dict[typing.Tuple[int, str], int],
+        iteration: int,
+        best_licenses: int,
+    ) -> typing.Union[typing.Tuple[int, str], None]:
+        """
+        returns the best admissible move (chain, manager) of the candidate
+        chains, i.e. the one with the smallest license delta. Ties are
+        broken randomly. The candidates are a sample of `candidates` chains
+        or all of them.
+        """
+        index = self.topology.index
+
+        chains: typing.Sequence[int] = range(len(placements))
+        if 0 < self.candidates < len(placements):
+            chains = self.rng.sample(chains, self.candidates)
+
+        min_delta = math.inf
+        moves: typing.List[typing.Tuple[int, str]] = []
+        for i in chains:
+            nodes = managed[i]
+            if len(nodes) == 0:
+                continue
+            manager = placements[i][1].management_node
+            leave = self.license_delta(manager, -len(nodes))
+
+            # the managers are eligible with the current management of
+            # the chain, reverting it only frees resources.
+            eligible = self.eligible.get(placements[i][0].chain, nodes)
+            for j in bits(eligible & ~(1 << index.ids[manager])):
+                candidate = index.names[j]
+                delta = leave + self.license_delta(candidate, len(nodes))
+                if delta > min_delta:
+                    continue
+                if (
+                    tabu.get((i, candidate), -1) >= iteration
+                    and self.licenses + delta >= best_licenses
+                ):
+                    continue
+                if delta < min_delta:
+                    min_delta = delta
+                    moves = []
+                moves.append((i, candidate))
+
+        if len(moves) == 0:
+            return None
+        return self.rng.choice(moves)
+
+    def counters(self) -> typing.Dict[str, float]:
+        return dict(
+            super().counters(), moves=self.moves, search_time=self.search_time
+        )
+
+    @property
+    def iteration_rate(self) -> float:
+        """
+        the tabu search iterations per second.
+        """
+        return self.iterations / self.search_time if self.search_time else 0.0
 
     def place_manager(
         self, chain: Chain, topology: Topology, placement: Placement
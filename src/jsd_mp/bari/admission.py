@@ -0,0 +1,183 @@
+"""
+Speculators of the Bari speculative admission.
+
+A speculator places the chains of a window against the same solver
+topology without applying them, their managers are chosen when they are
+committed, see `Bari.admit_speculatively`.
+"""
+import abc
+import logging
+import multiprocessing
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+from jsd_mp.domain import Chain, Placement, Topology, VNFM
+from jsd_mp.config import Config
+
+from .shared import SharedResiduals
+
+if typing.TYPE_CHECKING:
+    from .bari import Bari
+
+Speculation = typing.Union[Placement, None]
+
+# a path of a chain link
+Path = typing.List[typing.Tuple[str, str]]
+
+
+class Speculator(abc.ABC):
+    """
+    Speculator places the chains of a window against the solver topology,
+    each one with the random stream of its seed.
+    """
+
+    @abc.abstractmethod
+    def speculate(
+        self, bari: "Bari", chains: typing.List[Chain], seeds: typing.List[int]
+    ) -> typing.List[Speculation]:
+        pass
+
+    def close(self):
+        """
+        Release the resources of the speculator, e.g. its worker processes.
+        """
+
+
+class SerialSpeculator(Speculator):
+    """
+    SerialSpeculator places the chains one by one in the solver itself.
+    """
+
+    def speculate(
+        self, bari: "Bari", chains: typing.List[Chain], seeds: typing.List[int]
+    ) -> typing.List[Speculation]:
+        speculations = []
+        for chain, seed in zip(chains, seeds):
+            with bari.reseeded(seed):
+                speculations.append(bari.place(chain))
+        return speculations
+
+
+# the solver of a worker process, set by `_initialize`
+_worker: typing.Dict[str, typing.Any] = {}
+
+
+def _initialize(
+    name: str,
+    solver: typing.Type["Bari"],
+    vnfm: VNFM,
+    topology: Topology,
+    options: typing.Dict[str, typing.Any],
+):
+    bari = solver(Config({}, [], vnfm, topology))
+    for option, value in options.items():
+        setattr(bari, option, value)
+    _worker.update(
+        residuals=SharedResiduals(bari.topology.index, name), bari=bari
+    )
+
+
+def _speculate(
+    chain: Chain, seed: int
+) -> typing.Union[
+    typing.Tuple[
+        typing.List[str], typing.Dict[typing.Tuple[int, int], Path]
+    ],
+    None,
+]:
+    """
+    Speculate a chain on the published residual resources. The placement
+    is returned as its nodes and links because the chain of the parent
+    process must be used to build it.
+    """
+    bari: "Bari" = _worker["bari"]
+    # bring the worker topology up to date
+    _worker["residuals"].sync(bari.topology)
+
+    with bari.reseeded(seed):
+        p = bari.place(chain)
+    if p is None:
+        return None
+    return p.nodes, p.links
+
+
+class ProcessSpeculator(Speculator):
+    """
+    ProcessSpeculator places the chains of a window in worker processes.
+    Each worker holds a solver with a copy of the topology, that it brings
+    up to date with the residual arrays of the parent solver topology from
+    a shared memory block, so a task carries only its chain and its seed.
+
+    Each task uses the random stream of its seed, so the speculations
+    don't depend on the scheduling of the tasks. Processes cannot be
+    started from a daemon process (e.g. a worker of a
+    `multiprocessing.Pool`), so there it falls back to `SerialSpeculator`.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = logging.getLogger(__name__)
+        self.executor: typing.Union[ProcessPoolExecutor, None] = None
+        self.residuals: typing.Union[SharedResiduals, None] = None
+        self.fallback: typing.Union[Speculator, None] = None
+
+    def _start(self, bari: "Bari"):
+        self.residuals = SharedResiduals(bari.topology.index)
+        # the options of the solver (e.g. beam and bounded) are the class
+        # attributes that are annotated in its classes.
+        options = {
+            option: getattr(bari, option)
+            for cls in type(bari).__mro__
+            for option in vars(cls).get("__annotations__", {})
+        }
+        # the workers evaluate their stages in process
+        if bari.stage == "process":
+            options["stage"] = "vectorized"
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_initialize,
+            initargs=(
+                self.residuals.name,
+                type(bari),
+                bari.vnfm,
+                bari.topology,
+                options,
+            ),
+        )
+
+    def speculate(
+        self, bari: "Bari", chains: typing.List[Chain], seeds: typing.List[int]
+    ) -> typing.List[Speculation]:
+        if self.fallback is None and multiprocessing.current_process().daemon:
+            self.logger.warning(
+                "processes cannot be started in a daemon process, "
+                "chains are speculated in process"
+            )
+            self.fallback = SerialSpeculator()
+        if self.fallback is not None:
+            return self.fallback.speculate(bari, chains, seeds)
+
+        if self.executor is None:
+            self._start(bari)
+        assert self.executor is not None and self.residuals is not None
+
+        self.residuals.publish(bari.topology)
+
+        speculations: typing.List[Speculation] = []
+        for chain, result in zip(
+            chains, self.executor.map(_speculate, chains, seeds)
+        ):
+            if result is None:
+                speculations.append(None)
+            else:
+                speculations.append(Placement(chain, *result))
+        return speculations
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.residuals is not None:
+            self.residuals.close(unlink=True)
+            self.residuals = None
@@ -0,0 +1,231 @@
+"""
+Batched manager assignment of the Bari solver.
+
+Bari chooses the manager of each chain right after its placement, so an
+earlier chain may take the spare capacity that a later chain needs. With
+its `batch` option the managers of a batch of placed chains are assigned
+together by `ManagerAssignment`, a bounded-depth augmenting path heuristic.
+"""
+import itertools
+import typing
+
+from jsd_mp.domain import Placement, ManagementPlacement
+from jsd_mp.domain.index import bits
+
+if typing.TYPE_CHECKING:
+    from .bari import Bari
+
+# an augmenting path: the inserted chain and its manager, then each ejected
+# chain and its new manager, as (chain position, manager id).
+Path = typing.List[typing.Tuple[int, int]]
+
+
+class ManagerAssignment:
+    """
+    ManagerAssignment assigns the managers of a batch of placed (and
+    applied) chains over their eligible (chain, manager) pairs with
+    augmenting paths of a bounded depth. It is a heuristic: the license
+    cost is a step function of the managed functions, so the paths are
+    not the ones of a min-cost flow and the result is not guaranteed to
+    be optimal, it only lets a chain take a manager that an earlier chain
+    of the batch doesn't need.
+
+    The chains are inserted in their order, each one along the cheapest
+    path that is found: the chain takes an eligible manager and the path
+    may move (eject) a chain of the batch from that manager to another
+    eligible one, and so on for at most `depth` chains. A chain that
+    is moved once is not moved again by the same path.
+    The cost of a manager on the path is the change in its licenses, i.e.
+    the capacity step of its vnfms, so the cost of a path is the change in
+    the number of licenses. The ties are broken by the shorter path and
+    then by the order of the managers in the topology, so without any
+    ejection the chains get the managers of `Bari.place_manager`.
+
+    The eligibility is the one of `Solver.eligible`: the managers must
+    cover the managed nodes of a chain (radius and notManagerNodes) and
+    a manager that needs an additional vnfm must have its resources,
+    after the functions that the path moves in and out of it.
+    """
+
+    def __init__(
+        self,
+        bari: "Bari",
+        placements: typing.List[Placement],
+        depth: int = 2,
+    ):
+        self.bari = bari
+        self.placements = placements
+        self.depth = depth
+        # the managed nodes of each chain
+        self.managed = [
+            list(itertools.compress(p.nodes, p.chain.manageable_functions))
+            for p in placements
+        ]
+        self.managers: typing.List[
+            typing.Union[ManagementPlacement, None]
+        ] = [None] * len(placements)
+        # manager id -> the positions of its chains
+        self.assigned: typing.Dict[int, typing.Set[int]] = {}
+        # number of the chains that are moved by the augmenting paths
+        self.ejections: int = 0
+
+    def covers(self, i: int) -> int:
+        return self.bari.eligible.covers(
+            self.placements[i].chain, self.managed[i]
+        )
+
+    def delta(self, manager: int, functions: int) -> int:
+        return self.bari.license_delta(
+            self.bari.topology.index.names[manager], functions
+        )
+
+    def shortest_path(self, i: int) -> typing.Union[Path, None]:
+        """
+        Find the cheapest augmenting path that inserts the i-th chain.
+        """
+        # the managers that can host an additional vnfm, the others can
+        # only take the functions that fit in their current vnfms.
+        vnfm = self.bari.vnfm
+        fitting = self.bari.topology.fitting(vnfm.cores, vnfm.memory)
+
+        def feasible(m: int, functions: int) -> bool:
+            return bool(fitting >> m & 1) or self.delta(m, functions) <= 0
+
+        # the labels of a layer by (manager, the functions that enter it):
+        # the cost of the best path to it without the manager, its managers
+        # (to break the ties) and the path. A manager that cannot take
+        # the chain may take it after an ejection.
+        Label = typing.Tuple[int, typing.List[int], Path]
+        layer: typing.Dict[typing.Tuple[int, int], Label] = {
+            (m, len(self.managed[i])): (0, [m], [(i, m)])
+            for m in bits(self.covers(i))
+        }
+
+        best: typing.Union[
+            typing.Tuple[typing.Tuple[int, int, typing.List[int]], Path], None
+        ] = None
+        for hops in range(self.depth + 1):
+            following: typing.Dict[typing.Tuple[int, int], Label] = {}
+            for (m, functions), (cost, managers, path) in layer.items():
+                # the path ends on the manager
+                if feasible(m, functions):
+                    key = (cost + self.delta(m, functions), hops, managers)
+                    if best is None or key < best[0]:
+                        best = (key, path)
+                if hops == self.depth:
+                    continue
+
+                # or the manager ejects one of its chains
+                visited = sum(1 << manager for manager in managers)
+                moved = {j for j, _ in path}
+                for j in sorted(self.assigned.get(m, ())):
+                    out = len(self.managed[j])
+                    if j in moved or not feasible(m, functions - out):
+                        continue
+                    step = cost + self.delta(m, functions - out)
+                    for target in bits(self.covers(j) & ~visited):
+                        label = following.get((target, out))
+                        if label is None or (step, managers + [target]) < (
+                            label[0],
+                            label[1],
+                        ):
+                            following[(target, out)] = (
+                                step,
+                                managers + [target],
+                                path + [(j, target)],
+                            )
+            layer = following
+
+        return best[1] if best is not None else None
+
+    def routes(
+        self, manager: str, nodes: typing.List[str]
+    ) -> typing.Union[typing.List[typing.List[typing.Tuple[str, str]]], None]:
+        """
+        Returns the management routes from the manager to the given nodes
+        on the current topology or None if any of them is missing.
+        """
+        routes = []
+        for node in nodes:
+            route = self.bari.topology.path(
+                manager, node, self.bari.vnfm.bandwidth
+            )
+            if route is None:
+                return None
+            routes.append(route)
+        return routes
+
+    def insert(self, i: int) -> bool:
+        """
+        Assign the manager of the i-th chain along the cheapest augmenting
+        path and apply the changed managements on the solver.
+
+        The eligibility of the path is the one before its moves, so a moved
+        chain may take the bandwidth that a later route of the path needs.
+        The moves are applied in a transaction and the routes are found on
+        the topology of their step; if any of them is missing the path is
+        rolled back and the chain falls back to `Bari.place_manager`.
+        """
+        path = self.shortest_path(i)
+        if path is None:
+            return False
+
+        index = self.bari.topology.index
+        vnfm = self.bari.vnfm
+        moves: typing.List[typing.Tuple[int, ManagementPlacement]] = []
+
+        # the ejected chains move from the end of the path, so each manager
+        # frees its capacity before the previous chain enters it.
+        self.bari.begin()
+        for j, m in [*reversed(path[1:]), path[0]]:
+            previous = self.managers[j]
+            if previous is not None:
+                self.bari.revert_management(previous)
+            routes = self.routes(index.names[m], self.managed[j])
+            if routes is None:
+                self.bari.rollback()
+                return self.place(i)
+            mp = ManagementPlacement(
+                self.placements[j].chain, vnfm, index.names[m], routes
+            )
+            self.bari.apply_management(mp)
+            moves.append((j, mp))
+        self.bari.commit()
+
+        for j, mp in moves:
+            previous = self.managers[j]
+            if previous is not None:
+                self.assigned[index.ids[previous.management_node]].discard(j)
+                self.ejections += 1
+            self.managers[j] = mp
+            self.assigned.setdefault(
+                index.ids[mp.management_node], set()
+            ).add(j)
+        return True
+
+    def place(self, i: int) -> bool:
+        """
+        Assign the manager of the i-th chain without any ejection,
+        with `Bari.place_manager`.
+        """
+        p = self.placements[i]
+        mp = self.bari.place_manager(p.chain, self.bari.topology, p)
+        if mp is None:
+            return False
+        self.bari.apply_management(mp)
+        self.managers[i] = mp
+        self.assigned.setdefault(
+            self.bari.topology.index.ids[mp.management_node], set()
+        ).add(i)
+        return True
+
+    def assign(self) -> typing.List[typing.Union[ManagementPlacement, None]]:
+        """
+        Assign the managers of the chains and return them in the order of
+        the placements, None for the chains without any eligible manager.
+        """
+        for i in range(len(self.placements)):
+            if self.bari.expired():
+                break
+            self.insert(i)
+        return self.managers
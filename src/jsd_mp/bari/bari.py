@@ -1,9 +1,7 @@
 import typing
-import copy
 import math
+import heapq
 import itertools
-import random
-from concurrent.futures import ThreadPoolExecutor
 
 from jsd_mp.solver import Solver, PartialPlacement
 from jsd_mp.domain import (
@@ -14,6 +12,15 @@ from jsd_mp.domain import (
     Link,
     Topology,
 )
+from jsd_mp.domain.index import bits
+
+from jsd_mp.config import Config
+
+from .assignment import ManagerAssignment
+from .admission import Speculator, SerialSpeculator, ProcessSpeculator
+from .stage import STAGES, Stage, StageEvaluator, reduce_stage
+from .table import StateTable
+from .template import ChainTemplate
 
 
 class Bari(Solver):
@@ -28,185 +35,646 @@ class Bari(Solver):
     a stage for VNFM placement.
 
     The Bari placement of VNFs is useful in other algorithms.
+
+    The stages of the Viterbi algorithm are evaluated by the `stage` option:
+    serial, vectorized (default) or process that uses `workers` processes
+    (0 means the number of CPUs).
+
+    With a positive `beam` option, only the best beam states of each stage
+    are kept (beam search), so it trades the optimality for the speed.
+
+    With a non-zero `bounded` option, the states that cannot lead to a
+    complete placement are pruned and the last stage is expanded in the
+    best-first order of a lower bound of its cost (see `expand_bounded`).
+    It finds the same optimum with fewer expansions.
+
+    With a `window` option greater than one, windows of chains are placed
+    in parallel by `workers` processes and committed in the chain order
+    (see `admit_speculatively`).
+
+    With a `batch` option greater than one, the chains are placed in batches
+    of batch chains and the managers of each batch are assigned together
+    (see `admit_batches`).
     """
 
-    executor = ThreadPoolExecutor(max_workers=100)
+    stage: str = "vectorized"
+    workers: int = 0
+    beam: int = 0
+    window: int = 0
+    bounded: int = 0
+    batch: int = 0
+
+    def __init__(
+        self, config: Config, parent: typing.Union[Solver, None] = None
+    ):
+        super().__init__(config, parent)
+        # number of the states that are expanded as previous nodes
+        self.expansions: int = 0
+        # counters of the speculative admission
+        self.speculated: int = 0
+        self.conflicts: int = 0
+        self.retries: int = 0
+        # number of the chains that are moved by the batched assignments
+        self.ejections: int = 0
+        self._stage: typing.Union[StageEvaluator, None] = None
+        # the viterbi state tables by the chain length
+        self._tables: typing.Dict[int, StateTable] = {}
+        # the chain templates by the chain fingerprint
+        self._templates: typing.Dict[typing.Hashable, ChainTemplate] = {}
+
+    def solve(
+        self,
+        deadline: typing.Union[float, None] = None,
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        try:
+            return super().solve(deadline)
+        finally:
+            if self._stage is not None:
+                self._stage.close()
+                self._stage = None
 
     def _solve(
         self,
     ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        if self.batch > 1:
+            return self.admit_batches()
+        if self.window > 1:
+            return self.admit_speculatively()
+
         placements: typing.List[
             typing.Tuple[Placement, ManagementPlacement]
         ] = []
 
         for chain in self.chains:
-            self.logger.info("Placement of %s started", chain.name)
+            if self.expired():
+                break
+            self.considered += 1
 
+            admitted = self.admit(chain, self.rng.getrandbits(64))
+            if admitted is not None:
+                placements.append(admitted)
+
+        return placements
+
+    def admit(
+        self, chain: Chain, seed: int
+    ) -> typing.Union[typing.Tuple[Placement, ManagementPlacement], None]:
+        """
+        place the chain and its manager and apply them on the topology.
+        The chain is placed with its own random stream of the given seed,
+        so its placement doesn't depend on the draws of the other chains
+        (see `admit_speculatively`).
+        """
+        self.logger.info("Placement of %s started", chain.name)
+
+        with self.reseeded(seed):
             p = self.place(chain)
-            if p is not None:
-                self.logger.info(
-                    "VNF Placement of %s was successful", chain.name
-                )
+        if p is None:
+            self.logger.info("VNF Placement of %s failed", chain.name)
+            return None
 
-                topo = copy.deepcopy(self.topology)
-                p.apply_on_topology(topo)
-                mp = self.place_manager(chain, topo, p)
-                if mp is not None:
-                    self.manage_by_node[
-                        mp.management_node
-                    ] = self.manage_by_node.get(mp.management_node, 0) + sum(
-                        chain.manageable_functions
-                    )
-                    p.apply_on_topology(self.topology)
-                    mp.apply_on_topology(self.topology)
-                    placements.append((p, mp))
-                else:
+        self.logger.info("VNF Placement of %s was successful", chain.name)
+        return self.admit_placement(chain, p)
+
+    def admit_placement(
+        self, chain: Chain, p: Placement
+    ) -> typing.Union[typing.Tuple[Placement, ManagementPlacement], None]:
+        """
+        apply the placement of the chain with its manager on the topology.
+        """
+        # apply the placement in place to find its manager
+        # and roll it back if there isn't any.
+        self.begin()
+        p.apply_on_topology(self.topology)
+        mp = self.place_manager(chain, self.topology, p)
+        if mp is None:
+            self.rollback()
+            self.logger.info(
+                "the placement %s failed because of its manager",
+                chain.name,
+            )
+            return None
+
+        self.apply_management(mp)
+        self.commit()
+        return p, mp
+
+    def admit_batches(
+        self,
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        admit the chains in batches of `batch` chains. The chains of a batch
+        are placed one by one and then their managers are assigned together
+        (see `ManagerAssignment`), the placements of the chains without any
+        manager are reverted.
+
+        The assignment replaces `place_manager`, so the subclasses that
+        change it cannot use the batches.
+        """
+        if type(self).place_manager is not Bari.place_manager:
+            raise ValueError(
+                f"{type(self).__name__} has its own manager placement, "
+                "so its managers cannot be assigned in batches"
+            )
+
+        placements: typing.List[
+            typing.Tuple[Placement, ManagementPlacement]
+        ] = []
+
+        for start in range(0, len(self.chains), self.batch):
+            if self.expired():
+                break
+            batch = self.chains[start : start + self.batch]
+            self.considered += len(batch)
+
+            placed: typing.List[Placement] = []
+            for chain in batch:
+                p = self.place(chain)
+                if p is None:
+                    self.logger.info("VNF Placement of %s failed", chain.name)
+                    continue
+                p.apply_on_topology(self.topology)
+                placed.append(p)
+
+            assignment = ManagerAssignment(self, placed)
+            for p, mp in zip(placed, assignment.assign()):
+                if mp is None:
+                    p.revert_on_topology(self.topology)
                     self.logger.info(
                         "the placement %s failed because of its manager",
-                        chain.name,
+                        p.chain.name,
                     )
-            else:
-                self.logger.info("VNF Placement of %s failed", chain.name)
+                else:
+                    placements.append((p, mp))
+            self.ejections += assignment.ejections
+
+        self.logger.info(
+            "the managers are assigned in batches with %d ejections",
+            self.ejections,
+        )
+
+        return placements
+
+    def admit_speculatively(
+        self,
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        admit the chains in windows of `window` chains. The chains of a
+        window are placed speculatively (in parallel) against the same
+        topology and then they are committed in the chain order, each one
+        with the manager of the management counts of its turn.
+
+        A speculation that uses a node (as a host) or a link that is
+        updated by an earlier commit of its window is a conflict, and its
+        chain is placed again (retried) on the current topology. The chains
+        that failed are retried too if there is an earlier commit in their
+        window, because they may fit now. The seeds of the chains are drawn
+        in their order as `_solve` does and a retry uses the seed of its
+        chain, so the chains get the placements and managers of the one by
+        one admission, but for their ties: an earlier commit may still
+        change the tied candidates of a speculation on other nodes.
+        """
+        placements: typing.List[
+            typing.Tuple[Placement, ManagementPlacement]
+        ] = []
+
+        if self.workers == 1:
+            speculator: Speculator = SerialSpeculator()
+        else:
+            speculator = ProcessSpeculator(self.workers)
+
+        try:
+            for start in range(0, len(self.chains), self.window):
+                if self.expired():
+                    break
+                window = self.chains[start : start + self.window]
+                self.considered += len(window)
+                seeds = [self.rng.getrandbits(64) for _ in window]
+
+                # the nodes and links that are updated by the commits
+                nodes: typing.Set[str] = set()
+                links: typing.Set[typing.Tuple[str, str]] = set()
+
+                for chain, seed, p in zip(
+                    window, seeds, speculator.speculate(self, window, seeds)
+                ):
+                    self.speculated += 1
+
+                    admitted = None
+                    if p is not None and not self.conflicts_with(
+                        p, nodes, links
+                    ):
+                        admitted = self.admit_placement(chain, p)
+                    elif p is not None or len(nodes) != 0:
+                        if p is not None:
+                            self.conflicts += 1
+                        self.retries += 1
+                        admitted = self.admit(chain, seed)
+
+                    if admitted is not None:
+                        placements.append(admitted)
+                        used_nodes, used_links = self.resources(*admitted)
+                        nodes.update(used_nodes)
+                        links.update(used_links)
+        finally:
+            speculator.close()
+
+        self.logger.info(
+            "%d chains are speculated with %d conflicts and %d retries",
+            self.speculated,
+            self.conflicts,
+            self.retries,
+        )
 
         return placements
 
+    @staticmethod
+    def resources(
+        p: Placement, mp: typing.Union[ManagementPlacement, None] = None
+    ) -> typing.Tuple[
+        typing.Set[str], typing.Set[typing.Tuple[str, str]]
+    ]:
+        """
+        returns the nodes and links whose resources are used by the given
+        placement and its manager. the manager is always included because
+        it may host an additional vnfm.
+        """
+        nodes = {
+            node
+            for node, fn in zip(p.nodes, p.chain.functions)
+            if fn.cores > 0 or fn.memory > 0
+        }
+        paths: typing.List[typing.List[typing.Tuple[str, str]]] = list(
+            p.links.values()
+        )
+        if mp is not None:
+            nodes.add(mp.management_node)
+            paths.extend(mp.management_links)
+
+        links: typing.Set[typing.Tuple[str, str]] = set()
+        for path in paths:
+            links.update(path)
+        return nodes, links
+
+    @classmethod
+    def conflicts_with(
+        cls,
+        p: Placement,
+        nodes: typing.Set[str],
+        links: typing.Set[typing.Tuple[str, str]],
+    ) -> bool:
+        """
+        check if the placement uses the resources of any of
+        the given nodes or links.
+        """
+        used_nodes, used_links = cls.resources(p)
+        return not (
+            nodes.isdisjoint(used_nodes) and links.isdisjoint(used_links)
+        )
+
+    @property
+    def conflict_rate(self) -> float:
+        """
+        the rate of the speculations that conflict with an earlier commit.
+        """
+        return self.conflicts / self.speculated if self.speculated else 0.0
+
+    @property
+    def retry_rate(self) -> float:
+        """
+        the rate of the speculated chains that are placed again.
+        """
+        return self.retries / self.speculated if self.speculated else 0.0
+
     def place_manager(
         self, chain: Chain, topology: Topology, placement: Placement
     ) -> typing.Union[ManagementPlacement, None]:
         """
-        Iterate over the all topology node and then select a manager
-        for given chain.
+        select the manager with the minimum management cost for given chain,
+        the ties are broken in the order of the topology nodes.
         """
-        min_cost = float("inf")
-        # min_node is a node that costs min_cost
-        min_node = ""
-
-        for node in topology.nodes:
-            if self.is_management_resource_available(
-                topology,
-                node,
-                list(
-                    itertools.compress(
-                        placement.nodes, chain.manageable_functions
-                    )
-                ),
-            ):
-                cost = self.get_management_cost(
-                    topology,
-                    node,
-                    list(
-                        itertools.compress(
-                            placement.nodes, chain.manageable_functions
-                        )
-                    ),
-                )
-                if min_cost > cost:
-                    min_cost = cost
-                    min_node = node
+        nodes = list(
+            itertools.compress(placement.nodes, chain.manageable_functions)
+        )
 
-        if min_cost == float("inf"):
+        managers = self.rank_managers(topology, nodes, 1)
+        if len(managers) == 0:
             return None
+        manager = managers[0]
 
+        # the paths are computed only for the selected manager
         paths = []
-        for node in itertools.compress(
-            placement.nodes, chain.manageable_functions
-        ):
-            path = topology.path(min_node, node, self.vnfm.bandwidth)
+        for node in nodes:
+            path = topology.path(manager, node, self.vnfm.bandwidth)
             if path is not None:
                 paths.append(path)
 
-        return ManagementPlacement(chain, self.vnfm, min_node, paths)
+        return ManagementPlacement(chain, self.vnfm, manager, paths)
+
+    def rank_managers(
+        self, topology: Topology, nodes: typing.List[str], k: int
+    ) -> typing.List[str]:
+        """
+        returns the k best managers for the given nodes in the order of
+        their management cost and then their order in the topology.
+        """
+        index = topology.index
+        costs = self.get_management_costs(
+            topology, nodes, self.eligible_managers(topology, nodes)
+        )
+        return [
+            index.names[m]
+            for m in heapq.nsmallest(k, costs, key=lambda m: (costs[m], m))
+        ]
 
     def place(self, chain: Chain) -> typing.Union[Placement, None]:
         """
         place VNF on `self.topology` but it doesn't update the topology
         and you need to apply it later.
         """
-        # cost represents the cumulative cost of placing the i-th function
-        # on the node j. The cost is updated on each step of chain placement.
-        cost: typing.Dict[typing.Tuple[int, str], int] = {}
-        pi: typing.Dict[typing.Tuple[int, str], PartialPlacement] = {}
+        index = self.topology.index
+
+        # table holds the cost of placing the i-th function on the node j
+        # and its predecessor. The cost is updated on each step of
+        # chain placement.
+        table = self._tables.get(len(chain))
+        if table is None or table.n != len(index):
+            table = StateTable(len(chain), len(index))
+            self._tables[len(chain)] = table
+        table.reset()
+
+        # the nodes of each stage that can lead to a complete placement,
+        # the other states are dominated so they are pruned.
+        completions = self.completions(chain) if self.bounded else None
 
         # place the ingress function, this placement is different from others
         # because there is no previous node available.
-        for n in self.topology.nodes:
-            if self.is_resource_available(
-                self.topology, "", n, chain.functions[0], None
-            ):
-                cost[(0, n)] = self.get_cost(
-                    self.topology, "", n, chain.functions[0], None
-                )
-                pi[(0, n)] = PartialPlacement(chain).append(n, None)
+        for j, c in self.first_stage(chain).items():
+            table.set(0, j, c, -1, None)
+        self.prune(table, 0, completions)
 
         # place rest of the functions
         for i in range(1, len(chain.functions)):
+            if completions is not None and i == len(chain) - 1:
+                stage, applied = self.expand_bounded(chain, table)
+            else:
+                stage, applied = self.expand(
+                    chain, i, table, bits(table.reached[i - 1])
+                )
 
-            # The partial placement of step i-1 applied on the topology depends
-            # only on the previous node k, not on the current target j. Compute
-            # it once per candidate k and reuse it (read-only) across every j
-            # and both cost call-sites. This replaces the previous N*N*2
-            # full-topology deepcopies per function with just N, without
-            # changing the result. `apply_on_topology` deep-copies, so each
-            # `applied[k]` is an independent topology that callers only read.
-            applied: typing.Dict[str, Topology] = {
-                k: pi[(i - 1, k)].apply_on_topology(self.topology)
-                for k in self.topology.nodes
-                if (i - 1, k) in pi
-            }
-
-            def task(j: str, i: int):
-                min_cost = float("inf")
-                min_k = ""
-
-                for k, topo_k in applied.items():
-                    if self.is_resource_available(
-                        topo_k,
-                        k,
-                        j,
-                        chain.functions[i],
-                        chain.links[(i - 1, i)],
-                    ):
-                        c = self.get_cost(
-                            topo_k,
-                            k,
-                            j,
-                            chain.functions[i],
-                            chain.links[(i - 1, i)],
-                        )
-                        if min_cost > c or (
-                            min_cost == c and random.randint(0, 100) <= 50
-                        ):
-                            min_cost = c
-                            min_k = k
-
-                if min_cost == float("inf"):
-                    return
-                cost[(i, j)] = int(min_cost)
+            for name, (c, min_k) in stage.items():
                 path = applied[min_k].path(
-                    min_k, j, chain.links[(i - 1, i)].bandwidth
+                    min_k, name, chain.links[(i - 1, i)].bandwidth
                 )
-                pi[(i, j)] = pi[(i - 1, min_k)].copy().append(j, path)
-
-            for _ in self.executor.map(
-                task, self.topology.nodes, [i for _ in self.topology.nodes]
-            ):
-                pass
+                table.set(i, index.ids[name], c, index.ids[min_k], path)
+            self.prune(table, i, completions)
 
         # find the minimum cost of placement
+        last = len(chain) - 1
         min_cost = float("inf")
-        min_placement = None
+        min_node = -1
 
-        for pair, c in cost.items():
-            if len(pi[pair].nodes) == len(chain):
-                if min_cost > c or (
-                    min_cost == c and random.randint(0, 100) <= 50
-                ):
-                    min_placement = pi[pair]
-                    min_cost = c
+        for j in bits(table.reached[last]):
+            c = table.cost[last * table.n + j]
+            if min_cost > c or (
+                min_cost == c and self.rng.randint(0, 100) <= 50
+            ):
+                min_node = j
+                min_cost = c
 
-        if min_placement is None:
+        if min_node == -1:
             return None
-        return Placement(chain, min_placement.nodes, min_placement.links)
+        placement = self.partial(chain, table, last, min_node)
+        return Placement(chain, placement.nodes, placement.links)
+
+    def expand(
+        self,
+        chain: Chain,
+        i: int,
+        table: StateTable,
+        states: typing.Iterable[int],
+    ) -> typing.Tuple[Stage, typing.Dict[str, Topology]]:
+        """
+        evaluate the i-th stage from the given states of the previous stage
+        and return it with the applied topology of each of them.
+        """
+        names = self.topology.index.names
+
+        # The partial placement of step i-1 applied on the topology depends
+        # only on the previous node k, not on the current target j. Compute
+        # it once per candidate k and reuse it (read-only) across every j.
+        # `apply_on_topology` returns an overlay, so each `applied[k]`
+        # holds only the updates of its own placement on top of
+        # `self.topology`.
+        applied: typing.Dict[str, Topology] = {
+            names[k]: self.partial(chain, table, i - 1, k).apply_on_topology(
+                self.topology
+            )
+            for k in states
+        }
+        self.expansions += len(applied)
+
+        return self.evaluate_stage(chain, i, applied), applied
+
+    def expand_bounded(
+        self, chain: Chain, table: StateTable
+    ) -> typing.Tuple[Stage, typing.Dict[str, Topology]]:
+        """
+        evaluate the last stage like `expand` but in the best-first order.
+        The states of the previous stage are expanded in the order of their
+        lower bounds (see `final_bounds`) and it stops when the bound of the
+        next state reaches the best cost that is found. The skipped states
+        cannot place the last function with a cost less than the best one,
+        so the optimum is the same but some of its ties may be skipped
+        (ties are broken randomly anyway).
+        """
+        last = len(chain) - 1
+        index = self.topology.index
+
+        bounds = self.final_bounds(chain, table.reached[last - 1])
+        order = sorted(bounds, key=lambda k: bounds[k])
+        batch = self.evaluator.batch
+
+        upper = float("inf")
+        columns: typing.Dict[int, typing.List[typing.Tuple[str, int]]] = {}
+        applied: typing.Dict[str, Topology] = {}
+
+        for start in range(0, len(order), batch):
+            if bounds[order[start]] >= upper:
+                break
+            stage, batch_applied = self.expand(
+                chain, last, table, order[start : start + batch]
+            )
+            applied.update(batch_applied)
+            for j, (c, k) in stage.items():
+                columns.setdefault(index.ids[j], []).append((k, c))
+                upper = min(upper, c)
+
+        # break the ties in the order of the previous nodes as `expand` does
+        for column in columns.values():
+            column.sort(key=lambda kc: index.ids[kc[0]])
+
+        return {
+            index.names[j]: v
+            for j, v in reduce_stage(columns, self.rng).items()
+        }, applied
+
+    def completions(self, chain: Chain) -> typing.List[int]:
+        """
+        returns the bitset of the nodes of each stage that may lead to
+        a complete placement. A node can host the function of its stage
+        only if it has the resources on `self.topology` (partial placements
+        only decrease them) and it must structurally reach a node of the
+        next stage.
+        """
+        index = self.topology.index
+
+        completions = [0] * len(chain)
+        following = -1
+        for i in reversed(range(len(chain))):
+            fn = chain.functions[i]
+            hosts = index.hosts(fn.direction) & self.topology.fitting(
+                fn.cores, fn.memory
+            )
+            for j in bits(hosts):
+                if index.reach[j] & following:
+                    completions[i] |= 1 << j
+            following = completions[i]
+        return completions
+
+    def final_bounds(
+        self, chain: Chain, states: int
+    ) -> typing.Dict[int, int]:
+        """
+        returns a lower bound of the cost of placing the last function
+        from each of the given states of the previous stage (by their id).
+        The states without any feasible target are dropped.
+
+        It is the minimum of `get_cost` over the targets that may host the
+        last function on `self.topology`, the structural hop distance is
+        exact and the penalty only grows with the partial placements.
+        Subclasses that change the cost function must change it too.
+        """
+        index = self.topology.index
+        not_managers = index.not_managers
+        n = len(index)
+
+        fn = chain.functions[-1]
+        targets = index.hosts(fn.direction) & self.topology.fitting(
+            fn.cores, fn.memory
+        )
+        weak = ~self.topology.fitting(self.vnfm.cores, self.vnfm.memory)
+
+        bounds: typing.Dict[int, int] = {}
+        for k in bits(states):
+            bound = -1
+            for j in bits(targets & index.reach[k]):
+                c = (not_managers[k] | not_managers[j]).bit_count()
+                c += index.hops[k * n + j]
+                if weak >> j & 1:
+                    c += 100
+                if bound == -1 or c < bound:
+                    bound = c
+            if bound != -1:
+                bounds[k] = bound
+        return bounds
+
+    def first_stage(self, chain: Chain) -> typing.Dict[int, int]:
+        """
+        returns the cost of placing the ingress function of the chain on
+        each of its candidates by their id. They are memoized by the shape
+        of the chain and are computed again only for the nodes that are
+        updated since their last use.
+        """
+        template = self._templates.get(chain.fingerprint)
+        if template is None or template.topology is not self.topology:
+            template = ChainTemplate(self.topology)
+            self._templates[chain.fingerprint] = template
+
+        dirty = template.dirty()
+        if dirty != 0:
+            fn = chain.functions[0]
+            candidates = (
+                self.topology.index.hosts(fn.direction)
+                & self.topology.fitting(fn.cores, fn.memory)
+                & dirty
+            )
+            template.update(
+                dirty,
+                candidates,
+                self.get_costs(self.topology, "", candidates, fn, None),
+            )
+        return template.costs
+
+    def prune(
+        self,
+        table: StateTable,
+        i: int,
+        completions: typing.Union[typing.List[int], None],
+    ):
+        """
+        drop the states of the i-th stage that cannot lead to a complete
+        placement (see `completions`) and then keep only the best `beam`
+        states in the beam mode. The states are ordered by their cost plus
+        a lower bound of the cost of the next step from them,
+        i.e. the nodes that cannot manage them, and then by their node id.
+        """
+        if completions is not None:
+            table.keep(i, completions[i])
+
+        if self.beam <= 0 or i == table.stages - 1:
+            return
+
+        not_managers = self.topology.index.not_managers
+        states = sorted(
+            bits(table.reached[i]),
+            key=lambda j: table.cost[i * table.n + j]
+            + not_managers[j].bit_count(),
+        )
+
+        keep = 0
+        for j in states[: self.beam]:
+            keep |= 1 << j
+        table.keep(i, keep)
+
+    def partial(
+        self, chain: Chain, table: StateTable, i: int, j: int
+    ) -> PartialPlacement:
+        """
+        reconstruct the partial placement of the state (i, j)
+        from its predecessors.
+        """
+        names = self.topology.index.names
+        nodes, paths = table.trace(i, j)
+
+        placement = PartialPlacement(chain).append(names[nodes[0]], None)
+        for node, path in zip(nodes[1:], paths):
+            placement.append(names[node], path)
+        return placement
+
+    def evaluate_stage(
+        self,
+        chain: Chain,
+        i: int,
+        applied: typing.Dict[str, Topology],
+    ) -> Stage:
+        """
+        evaluate the i-th stage of the viterbi algorithm. `applied[k]` is
+        the topology with the partial placement that ends on k applied on it.
+        It returns the minimum cost of placing the i-th function on each
+        feasible node j and the node k that achieves it.
+        The evaluation is done by the evaluator of the `stage` option.
+        """
+        return self.evaluator.evaluate(self, chain, i, applied)
+
+    @property
+    def evaluator(self) -> StageEvaluator:
+        """
+        the stage evaluator of the `stage` option.
+        """
+        if self._stage is None:
+            self._stage = STAGES[self.stage](self.workers)
+        return self._stage
 
     def get_management_cost(
         self,
@@ -228,6 +696,32 @@ class Bari(Solver):
         )
         return future - current
 
+    def get_management_costs(
+        self,
+        topology: Topology,
+        nodes: typing.List[str],
+        candidates: int,
+    ) -> typing.Dict[int, int]:
+        """
+        the vectorized form of `get_management_cost`, it returns the cost of
+        selecting each of the candidates (a bitset over node ids) as the
+        manager of the given nodes by their id.
+        Subclasses that change the management cost must change both.
+        """
+        index = topology.index
+
+        # the nodes without any vnfm have the same cost
+        fresh = math.ceil(len(nodes) / self.vnfm.capacity)
+        costs = {m: fresh for m in bits(candidates)}
+
+        for manager, count in self.manage_by_node.items():
+            m = index.ids[manager]
+            if m in costs:
+                costs[m] = math.ceil(
+                    (count + len(nodes)) / self.vnfm.capacity
+                ) - math.ceil(count / self.vnfm.capacity)
+        return costs
+
     def get_cost(
         self,
         topology: Topology,
@@ -235,30 +729,29 @@ class Bari(Solver):
         current: str,
         fn: Type,
         link: typing.Union[Link, None],
-    ) -> int:
+    ) -> float:
         """
         called in each iteration of viterbi algorithms to find a minimum cost
         path. by considering the constraints in this function we can make
         algorithm to respect these constraints.
+        The current node costs math.inf if it cannot be reached from
+        the previous one.
         """
-        previous_not_managers = set()
+        # the nodes that cannot manage the previous or current node
+        index = topology.index
+        not_managers = index.not_managers[index.ids[current]]
         if previous != "":
-            previous_not_managers = set(
-                topology.nodes[previous].not_manager_nodes
-            )
-        current_not_managers = set(topology.nodes[current].not_manager_nodes)
+            not_managers |= index.not_managers[index.ids[previous]]
 
         path_length = 0
         if previous != "" and link is not None:
-            # the placement currently applied on topology, so we find the path
-            # with zero bandwidth -- i.e. a purely structural shortest path that
-            # does not depend on the applied placement, so it is cached per pair.
-            cached = self.struct_path_len.get((previous, current))
-            if cached is None:
-                path = topology.path(previous, current, 0)
-                cached = int(float("inf")) if path is None else len(path)
-                self.struct_path_len[(previous, current)] = cached
-            path_length = cached
+            # the placement currently applied on topology, so we use the
+            # structural hop distance that does not depend on the applied
+            # placement.
+            hops = topology.hop_distance(previous, current)
+            if hops is None:
+                return math.inf
+            path_length = hops
 
         # consider penalty when there isn't enough resource for
         # a vnfm on a node
@@ -269,8 +762,49 @@ class Bari(Solver):
         ):
             penalty = 100
 
-        return (
-            len(current_not_managers | previous_not_managers)
-            + path_length
-            + penalty
-        )
+        return not_managers.bit_count() + path_length + penalty
+
+    def get_costs(
+        self,
+        topology: Topology,
+        previous: str,
+        candidates: int,
+        fn: Type,
+        link: typing.Union[Link, None],
+    ) -> typing.Dict[int, int]:
+        """
+        the vectorized form of `get_cost`, it returns the cost of placing
+        fn on each of the candidates (a bitset over node ids) by their id.
+        Subclasses that change the cost function must change both.
+        The candidates that cannot be reached from the previous node are
+        left out. Without a previous node, the costs must depend only on
+        the residual resources of the nodes, because they are memoized
+        (see `first_stage`).
+        They must not be less than `final_bounds` in the bounded mode.
+        """
+        index = topology.index
+
+        # the nodes that cannot manage the previous node and
+        # the hop distances from it.
+        not_managers = 0
+        hops = None
+        if previous != "":
+            k = index.ids[previous]
+            not_managers = index.not_managers[k]
+            if link is not None:
+                hops = index.hops[k * len(index) : (k + 1) * len(index)]
+
+        # nodes that don't have enough resource for a vnfm get the penalty
+        weak = ~topology.fitting(self.vnfm.cores, self.vnfm.memory)
+
+        costs: typing.Dict[int, int] = {}
+        for j in bits(candidates):
+            c = (not_managers | index.not_managers[j]).bit_count()
+            if hops is not None:
+                if hops[j] == -1:
+                    continue
+                c += hops[j]
+            if weak >> j & 1:
+                c += 100
+            costs[j] = c
+        return costs
@@ -0,0 +1,89 @@
+import array
+import dataclasses
+import typing
+from multiprocessing.shared_memory import SharedMemory
+
+from jsd_mp.domain import Topology, TopologyIndex
+
+
+class SharedResiduals:
+    """
+    SharedResiduals shares the residual arrays (cores, memory and bandwidth)
+    of a topology with the worker processes through a shared memory block.
+    The parent creates the block and publishes the arrays into it and the
+    workers attach to it by its name and read them.
+    """
+
+    def __init__(self, index: TopologyIndex, name: str = ""):
+        self.n = len(index)
+        self.m = len(index.targets)
+        if name == "":
+            self.shm = SharedMemory(
+                create=True, size=max(8 * (2 * self.n + self.m), 1)
+            )
+        else:
+            self.shm = SharedMemory(name=name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def buf(self) -> memoryview:
+        buf = self.shm.buf
+        assert buf is not None, "the shared memory block is closed"
+        return buf
+
+    def publish(self, topology: Topology):
+        offset = 0
+        for values in (topology.cores, topology.memory, topology.bandwidth):
+            data = values.tobytes()
+            self.buf[offset : offset + len(data)] = data
+            offset += len(data)
+
+    def read(self) -> typing.Tuple[array.array, array.array, array.array]:
+        """
+        Returns a copy of the published cores, memory and bandwidth arrays.
+        """
+        n, m = self.n, self.m
+        values = []
+        for start, end in ((0, n), (n, 2 * n), (2 * n, 2 * n + m)):
+            a = array.array("q")
+            a.frombytes(self.buf[8 * start : 8 * end])
+            values.append(a)
+        return values[0], values[1], values[2]
+
+    def sync(self, topology: Topology):
+        """
+        Bring a copy of the topology up to date with the published arrays.
+        Only the changed nodes and links are updated so its caches
+        stay warm.
+        """
+        index = topology.index
+        cores, memory, bandwidth = self.read()
+        for i, name in enumerate(index.names):
+            if (
+                topology.cores[i] != cores[i]
+                or topology.memory[i] != memory[i]
+            ):
+                topology.update_node(
+                    name,
+                    dataclasses.replace(
+                        topology.nodes[name], cores=cores[i], memory=memory[i]
+                    ),
+                )
+        for e, (source, destination) in enumerate(index.link_names):
+            if topology.bandwidth[e] != bandwidth[e]:
+                topology.update_link(
+                    source,
+                    destination,
+                    dataclasses.replace(
+                        topology.links[(source, destination)],
+                        bandwidth=bandwidth[e],
+                    ),
+                )
+
+    def close(self, unlink: bool = False):
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
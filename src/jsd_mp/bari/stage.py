@@ -0,0 +1,364 @@
+"""
+Stage evaluators of the Bari Viterbi algorithm.
+
+A stage evaluator finds, for the i-th function of a chain, the minimum cost
+of placing it on each feasible node j and the previous node k that achieves
+it. Bari selects the evaluator with its `stage` option.
+"""
+import abc
+import array
+import logging
+import math
+import multiprocessing
+import os
+import random
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+from jsd_mp.domain import (
+    Chain,
+    Type,
+    Link,
+    Topology,
+    TopologyIndex,
+    TopologyOverlay,
+    VNFM,
+)
+from jsd_mp.domain.reachability import Reachability
+
+from .shared import SharedResiduals
+
+if typing.TYPE_CHECKING:
+    from .bari import Bari
+
+# the result of a stage: target node -> (cost, previous node)
+Stage = typing.Dict[str, typing.Tuple[int, str]]
+
+
+def reduce_stage(
+    columns: typing.Dict[int, typing.List[typing.Tuple[str, int]]],
+    rng: random.Random,
+) -> typing.Dict[int, typing.Tuple[int, str]]:
+    """
+    Select the minimum cost predecessor of each target. columns[j] holds
+    the (k, cost) pairs of the target j in the order of k and ties are
+    broken randomly in this order. Targets are visited in the id order.
+    """
+    stage: typing.Dict[int, typing.Tuple[int, str]] = {}
+    for j in sorted(columns):
+        min_k, min_cost = columns[j][0]
+        for k, c in columns[j][1:]:
+            if min_cost > c or (min_cost == c and rng.randint(0, 100) <= 50):
+                min_cost = c
+                min_k = k
+        stage[j] = (min_cost, min_k)
+    return stage
+
+
+class StageEvaluator(abc.ABC):
+    """
+    StageEvaluator evaluates the stages of the Bari Viterbi algorithm.
+    `applied[k]` is the solver topology with the partial placement
+    that ends on k applied on it.
+    """
+
+    # number of the previous nodes that are worth evaluating together
+    batch: int = 1
+
+    @abc.abstractmethod
+    def evaluate(
+        self,
+        bari: "Bari",
+        chain: Chain,
+        i: int,
+        applied: typing.Dict[str, Topology],
+    ) -> Stage:
+        pass
+
+    def close(self):
+        """
+        Release the resources of the evaluator, e.g. its worker processes.
+        """
+
+
+class SerialStage(StageEvaluator):
+    """
+    SerialStage checks each (k, j) pair on its own with
+    `is_resource_available` and `get_cost`. It is the reference
+    implementation of the other evaluators.
+    """
+
+    def evaluate(
+        self,
+        bari: "Bari",
+        chain: Chain,
+        i: int,
+        applied: typing.Dict[str, Topology],
+    ) -> Stage:
+        fn = chain.functions[i]
+        link = chain.links[(i - 1, i)]
+
+        stage: Stage = {}
+        for j in bari.topology.nodes:
+            min_cost = float("inf")
+            min_k = ""
+
+            for k, topo_k in applied.items():
+                if bari.is_resource_available(topo_k, k, j, fn, link):
+                    c = bari.get_cost(topo_k, k, j, fn, link)
+                    if c == math.inf:
+                        continue
+                    if min_cost > c or (
+                        min_cost == c and bari.rng.randint(0, 100) <= 50
+                    ):
+                        min_cost = c
+                        min_k = k
+
+            if min_k != "":
+                stage[j] = (int(min_cost), min_k)
+        return stage
+
+
+class VectorizedStage(StageEvaluator):
+    """
+    VectorizedStage computes the feasible targets of each k at once as
+    bitsets (direction and support, residual capacity and reachability with
+    the link's bandwidth) and their costs with `get_costs`.
+    """
+
+    def evaluate(
+        self,
+        bari: "Bari",
+        chain: Chain,
+        i: int,
+        applied: typing.Dict[str, Topology],
+    ) -> Stage:
+        fn = chain.functions[i]
+        link = chain.links[(i - 1, i)]
+        index = bari.topology.index
+        hosts = index.hosts(fn.direction)
+
+        # columns[j] holds the feasible (k, cost) pairs in the order of k
+        columns: typing.Dict[int, typing.List[typing.Tuple[str, int]]] = {}
+        for k, topo_k in applied.items():
+            feasible = (
+                hosts
+                & topo_k.fitting(fn.cores, fn.memory)
+                & topo_k.reachable(k, link.bandwidth)
+            )
+            for j, c in bari.get_costs(topo_k, k, feasible, fn, link).items():
+                columns.setdefault(j, []).append((k, c))
+
+        return {
+            index.names[j]: v
+            for j, v in reduce_stage(columns, bari.rng).items()
+        }
+
+
+class Residual:
+    """
+    Residual is a read-only view of a topology in the worker processes,
+    made of its index and residual arrays. It provides what the cost
+    functions (`get_costs`) use from a topology.
+    """
+
+    def __init__(
+        self,
+        index: TopologyIndex,
+        cores: array.array,
+        memory: array.array,
+        bandwidth: array.array,
+    ):
+        self.index = index
+        self.cores = cores
+        self.memory = memory
+        self.bandwidth = bandwidth
+
+    def fitting(self, cores: int, memory: int) -> int:
+        mask = 0
+        for i, (c, m) in enumerate(zip(self.cores, self.memory)):
+            if c >= cores and m >= memory:
+                mask |= 1 << i
+        return mask
+
+    def reachable(self, source: str, required_bandwidth: int) -> int:
+        return Reachability(self.index).reachable(
+            self.index.ids[source], self.bandwidth, required_bandwidth
+        )
+
+
+# the state of a worker process, set by `_initialize`
+_worker: typing.Dict[str, typing.Any] = {}
+
+
+def _initialize(
+    name: str,
+    index: TopologyIndex,
+    solver: typing.Type["Bari"],
+    vnfm: VNFM,
+):
+    # the cost functions only use the vnfm of the solver
+    bari = solver.__new__(solver)
+    bari.vnfm = vnfm
+    _worker.update(
+        residuals=SharedResiduals(index, name), index=index, bari=bari
+    )
+
+
+def _evaluate(
+    fn: Type,
+    link: Link,
+    seed: int,
+    deltas: typing.List[
+        typing.Tuple[
+            str,
+            typing.List[typing.Tuple[int, int, int]],
+            typing.List[typing.Tuple[int, int]],
+        ]
+    ],
+) -> typing.Dict[int, typing.Tuple[int, str]]:
+    """
+    Evaluate a stage for a part of the previous nodes. deltas holds each
+    previous node with the node (id, cores, memory) and link (id, bandwidth)
+    updates of its partial placement.
+    """
+    index: TopologyIndex = _worker["index"]
+    bari: "Bari" = _worker["bari"]
+    base = _worker["residuals"].read()
+
+    hosts = index.hosts(fn.direction)
+
+    columns: typing.Dict[int, typing.List[typing.Tuple[str, int]]] = {}
+    for k, nodes, links in deltas:
+        cores, memory, bandwidth = (array.array("q", a) for a in base)
+        for i, c, mem in nodes:
+            cores[i], memory[i] = c, mem
+        for e, bw in links:
+            bandwidth[e] = bw
+
+        topo_k = Residual(index, cores, memory, bandwidth)
+        feasible = (
+            hosts
+            & topo_k.fitting(fn.cores, fn.memory)
+            & topo_k.reachable(k, link.bandwidth)
+        )
+        for j, c in bari.get_costs(
+            typing.cast(Topology, topo_k), k, feasible, fn, link
+        ).items():
+            columns.setdefault(j, []).append((k, c))
+
+    return reduce_stage(columns, random.Random(seed))
+
+
+class ProcessStage(StageEvaluator):
+    """
+    ProcessStage splits the previous nodes of a stage between worker
+    processes. The workers receive the topology index once and read the
+    residual arrays of the solver topology from a shared memory block,
+    so a task carries only the updates of its partial placements.
+
+    Each task breaks its ties with its own random stream, seeded from the
+    solver's generator, and the results are merged in the task order,
+    so the placement doesn't depend on the scheduling of the tasks.
+
+    The workers evaluate `get_costs` on a bare solver that only has its
+    vnfm and on a `Residual` view of the topology.
+    Processes cannot be started from a daemon process (e.g. a worker of a
+    `multiprocessing.Pool`), so there it falls back to `VectorizedStage`.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch = 4 * self.workers
+        self.logger = logging.getLogger(__name__)
+        self.executor: typing.Union[ProcessPoolExecutor, None] = None
+        self.residuals: typing.Union[SharedResiduals, None] = None
+        self.fallback: typing.Union[StageEvaluator, None] = None
+
+    def _start(self, bari: "Bari"):
+        index = bari.topology.index
+        self.residuals = SharedResiduals(index)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_initialize,
+            initargs=(self.residuals.name, index, type(bari), bari.vnfm),
+        )
+
+    def evaluate(
+        self,
+        bari: "Bari",
+        chain: Chain,
+        i: int,
+        applied: typing.Dict[str, Topology],
+    ) -> Stage:
+        if self.fallback is None and multiprocessing.current_process().daemon:
+            self.logger.warning(
+                "processes cannot be started in a daemon process, "
+                "stages are evaluated in process"
+            )
+            self.fallback = VectorizedStage()
+        if self.fallback is not None:
+            return self.fallback.evaluate(bari, chain, i, applied)
+
+        if self.executor is None:
+            self._start(bari)
+        assert self.executor is not None and self.residuals is not None
+
+        index = bari.topology.index
+        # publish the residual arrays of the solver topology
+        self.residuals.publish(bari.topology)
+
+        # the updates of each partial placement over the solver topology
+        deltas = []
+        for k, topo_k in applied.items():
+            assert isinstance(topo_k, TopologyOverlay)
+            nodes = [
+                (index.ids[name], node.cores, node.memory)
+                for name, node in topo_k.updated_nodes.items()
+            ]
+            links = [
+                (index.link_ids[link], l.bandwidth)
+                for link, l in topo_k.updated_links.items()
+            ]
+            deltas.append((k, nodes, links))
+
+        # the number of tasks depends only on the number of workers
+        size = -(-len(deltas) // (4 * self.workers)) or 1
+        tasks = [deltas[t : t + size] for t in range(0, len(deltas), size)]
+        seeds = [bari.rng.getrandbits(64) for _ in tasks]
+
+        fn = chain.functions[i]
+        link = chain.links[(i - 1, i)]
+        results = self.executor.map(
+            _evaluate,
+            [fn] * len(tasks),
+            [link] * len(tasks),
+            seeds,
+            tasks,
+        )
+
+        # the candidates of each task are in the order of k too
+        columns: typing.Dict[int, typing.List[typing.Tuple[str, int]]] = {}
+        for result in results:
+            for j, (c, k) in result.items():
+                columns.setdefault(j, []).append((k, c))
+
+        return {
+            index.names[j]: v
+            for j, v in reduce_stage(columns, bari.rng).items()
+        }
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.residuals is not None:
+            self.residuals.close(unlink=True)
+            self.residuals = None
+
+
+STAGES: typing.Dict[str, typing.Callable[[int], StageEvaluator]] = {
+    "serial": lambda _: SerialStage(),
+    "vectorized": lambda _: VectorizedStage(),
+    "process": ProcessStage,
+}
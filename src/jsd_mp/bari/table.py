@@ -0,0 +1,77 @@
+import array
+import typing
+
+from jsd_mp.domain.index import bits
+
+# path of a chain link between two states, as returned by Topology.path
+Path = typing.Union[typing.List[typing.Tuple[str, str]], None]
+
+
+class StateTable:
+    """
+    StateTable is the dense table of the Viterbi states of a chain with
+    the given number of stages (functions) on a topology with n nodes.
+
+    The state (i, j) places the i-th function on the node j and it is stored
+    at `i * n + j`. A state keeps only its cost, its predecessor (the node
+    of the (i - 1)-th function) and the path from it, the placement of a
+    state is reconstructed by following the predecessors (see `trace`).
+
+    The table is reset between the chains, so a solver can reuse it
+    for all of its chains with the same length.
+    """
+
+    def __init__(self, stages: int, n: int):
+        self.stages = stages
+        self.n = n
+        self.cost: array.array = array.array("q", [0]) * (stages * n)
+        self.back: array.array = array.array("l", [-1]) * (stages * n)
+        self.paths: typing.List[Path] = [None] * (stages * n)
+        # bitset of the reached states of each stage
+        self.reached: typing.List[int] = [0] * stages
+
+    def reset(self):
+        for i, reached in enumerate(self.reached):
+            # drop the paths, so the table doesn't keep them alive
+            for j in bits(reached):
+                self.paths[i * self.n + j] = None
+            self.reached[i] = 0
+
+    def set(self, i: int, j: int, cost: int, back: int, path: Path):
+        """
+        Reach the state (i, j) from the state (i - 1, back) with the given
+        path between them. back is -1 for the first stage.
+        """
+        s = i * self.n + j
+        self.cost[s] = cost
+        self.back[s] = back
+        self.paths[s] = path
+        self.reached[i] |= 1 << j
+
+    def keep(self, i: int, states: int):
+        """
+        Keep only the given states (as a bitset) of the i-th stage.
+        """
+        for j in bits(self.reached[i] & ~states):
+            self.paths[i * self.n + j] = None
+        self.reached[i] &= states
+
+    def trace(
+        self, i: int, j: int
+    ) -> typing.Tuple[typing.List[int], typing.List[Path]]:
+        """
+        Returns the nodes of the states from the first stage to (i, j)
+        and the paths between them.
+        """
+        nodes: typing.List[int] = []
+        paths: typing.List[Path] = []
+        while i >= 0:
+            nodes.append(j)
+            s = i * self.n + j
+            if i > 0:
+                paths.append(self.paths[s])
+            j = self.back[s]
+            i -= 1
+        nodes.reverse()
+        paths.reverse()
+        return nodes, paths
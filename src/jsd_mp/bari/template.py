@@ -0,0 +1,45 @@
+import typing
+
+from jsd_mp.domain import Topology
+
+
+class ChainTemplate:
+    """
+    ChainTemplate memoizes the parts of Bari.place that depend only on the
+    shape of a chain (see Chain.fingerprint) and not on the chain itself,
+    i.e. the candidates of the first stage and their costs.
+
+    They depend on the residual resources of the topology, so the template
+    stores the epoch of the topology that they are computed at, and only
+    the nodes that are updated since then are computed again.
+    """
+
+    def __init__(self, topology: Topology):
+        self.topology = topology
+        # epoch of the topology at the last update, -1 means never
+        self.epoch: int = -1
+        # bitset of the candidates of the first stage and their costs
+        self.candidates: int = 0
+        self.costs: typing.Dict[int, int] = {}
+
+    def dirty(self) -> int:
+        """
+        Returns the bitset of the nodes that must be computed again.
+        """
+        if self.epoch < 0:
+            return (1 << len(self.topology.index)) - 1
+        return self.topology.changed(self.epoch)
+
+    def update(
+        self, dirty: int, candidates: int, costs: typing.Dict[int, int]
+    ):
+        """
+        Replace the candidates and costs of the dirty nodes with the given
+        ones, which are computed at the current epoch.
+        """
+        for j in list(self.costs):
+            if dirty >> j & 1:
+                del self.costs[j]
+        self.costs.update(costs)
+        self.candidates = (self.candidates & ~dirty) | candidates
+        self.epoch = self.topology.epoch
@@ -95,5 +95,7 @@ def load(directory: str) -> Config:
         topology.add_link(
             l["source"], l["destination"], Link(bandwidth=l["bandwidth"])
         )
+    # compile the topology, e.g. its notManagerNodes constraints into bitsets
+    topology.compile()
 
     return Config(types, chains, vnfm, topology)
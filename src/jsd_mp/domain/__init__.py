@@ -1,5 +1,7 @@
 from .nfv import Type, Chain
 from .direction import Direction
-from .topology import Link, Topology, Node
+from .topology import Link, Topology, TopologyOverlay, Node
+from .index import TopologyIndex
+from .reachability import Reachability
 from .vnfm import VNFM
 from .placement import Placement, ManagementPlacement
@@ -0,0 +1,255 @@
+import array
+import collections
+import typing
+
+from .direction import Direction
+
+if typing.TYPE_CHECKING:
+    from .topology import Topology
+
+
+class Residuals(typing.Protocol):
+    """
+    Residuals are the residual values (e.g. the bandwidth of the links)
+    indexed by the ids of a topology index.
+    """
+
+    def __getitem__(self, i: int) -> int:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+
+def bits(mask: int) -> typing.Iterator[int]:
+    """
+    Iterate over the positions of the set bits of the given mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class TopologyIndex:
+    """
+    TopologyIndex is the compiled form of a topology structure.
+
+    Node names are interned to dense integer ids (in the topology's insertion
+    order) and the adjacency lists are stored in CSR form: the out-links of
+    node `i` occupy the slots `offsets[i]` to `offsets[i + 1]` of `targets`.
+    The slot of a link is also its link id, so per-link values (e.g. residual
+    bandwidth) live in flat arrays indexed by the same id.
+
+    The notManagerNodes constraints of the nodes are compiled into bitsets
+    too: `not_managers[i]` has the bits of the nodes that cannot manage the
+    node `i`. Names that aren't in the topology get ids after the nodes,
+    so the number of set bits is the number of distinct names.
+
+    The same goes for the VNF support and the direction of the nodes,
+    see `hosts`.
+
+    The index only describes the structure (nodes, links and management
+    constraints), which never changes during a solve, so it is immutable
+    and shared between the copies of a topology.
+    """
+
+    def __init__(self, topology: "Topology"):
+        self.names: typing.List[str] = list(topology.nodes)
+        self.ids: typing.Dict[str, int] = {
+            name: i for i, name in enumerate(self.names)
+        }
+
+        self.offsets: array.array = array.array("l", [0])
+        self.targets: array.array = array.array("l")
+        # source node of each link, i.e. the CSR rows expanded
+        self.sources: array.array = array.array("l")
+        self.link_names: typing.List[typing.Tuple[str, str]] = []
+
+        for i, name in enumerate(self.names):
+            # keep the order of the adjacency list, so traversals visit
+            # neighbours exactly as the string-keyed topology does.
+            for adj in topology.connections[name]:
+                self.targets.append(self.ids[adj])
+                self.sources.append(i)
+                self.link_names.append((name, adj))
+            self.offsets.append(len(self.targets))
+
+        self.link_ids: typing.Dict[typing.Tuple[str, str], int] = {
+            link: e for e, link in enumerate(self.link_names)
+        }
+
+        # intern the unknown names of the notManagerNodes after the nodes
+        not_manager_ids = dict(self.ids)
+        self.not_managers: typing.List[int] = []
+        for name in self.names:
+            mask = 0
+            for not_manager in topology.nodes[name].not_manager_nodes:
+                mask |= 1 << not_manager_ids.setdefault(
+                    not_manager, len(not_manager_ids)
+                )
+            self.not_managers.append(mask)
+
+        # bitsets of the nodes that support VNFs and of the nodes per direction
+        self.vnf_support: int = 0
+        self.directions: typing.Dict[Direction, int] = {
+            direction: 0 for direction in Direction
+        }
+        for i, name in enumerate(self.names):
+            node = topology.nodes[name]
+            if node.vnf_support:
+                self.vnf_support |= 1 << i
+            self.directions[node.direction] |= 1 << i
+
+        # structural (bandwidth-independent) hop distances between all pairs
+        # of nodes. The distance from i to j is stored at `i * len(self) + j`
+        # and it is -1 when j isn't reachable from i. `reach[i]` is the
+        # bitset of the nodes that are reachable from i.
+        self.reach: typing.List[int] = []
+        self.hops: array.array = self._all_pairs_hops()
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, names: typing.Iterable[str]) -> int:
+        """
+        Returns the bitset of the given nodes.
+        """
+        mask = 0
+        for name in names:
+            mask |= 1 << self.ids[name]
+        return mask
+
+    def hosts(self, direction: Direction) -> int:
+        """
+        Returns the bitset of the nodes that support VNFs and can host
+        a function with the given direction.
+        """
+        if direction is Direction.INGRESS or direction is Direction.EGRESS:
+            return self.vnf_support & (
+                self.directions[direction] | self.directions[Direction.BOTH]
+            )
+        return self.vnf_support
+
+    def __deepcopy__(self, memo):
+        # the index is immutable so copies of a topology can share it.
+        return self
+
+    def _all_pairs_hops(self) -> array.array:
+        n = len(self.names)
+
+        # out-neighbours of each node as a bitset
+        neighbours = [0] * n
+        for source, target in zip(self.sources, self.targets):
+            neighbours[source] |= 1 << target
+
+        hops = array.array("l", [-1]) * (n * n)
+        for source in range(n):
+            row = source * n
+            hops[row + source] = 0
+
+            # level-synchronous BFS: expand the whole frontier at once
+            seen = 1 << source
+            frontier = seen
+            height = 0
+            while frontier:
+                height += 1
+                reached = 0
+                for node in bits(frontier):
+                    reached |= neighbours[node]
+                frontier = reached & ~seen
+                seen |= frontier
+                for node in bits(frontier):
+                    hops[row + node] = height
+            self.reach.append(seen)
+
+        return hops
+
+    def path(
+        self,
+        source: int,
+        destination: int,
+        bandwidth: Residuals,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> typing.Union[typing.List[int], None]:
+        """
+        Find the shortest path (in hops) from source to destination over
+        the links that have the required bandwidth and return its link ids.
+        Neighbours are visited in adjacency order, so ties are broken
+        exactly like a BFS on the adjacency lists.
+        """
+        if source == destination:
+            return []
+
+        offsets = self.offsets
+        targets = self.targets
+
+        # parent stores the link id that discovered each node
+        parent = [-1] * len(self.names)
+        parent[source] = len(self.targets)
+        depth = [0] * len(self.names)
+
+        q: typing.Deque[int] = collections.deque([source])
+
+        while len(q) != 0:
+            root = q.popleft()
+
+            if depth[root] == max_height:
+                continue
+
+            for e in range(offsets[root], offsets[root + 1]):
+                adj = targets[e]
+                if parent[adj] == -1 and bandwidth[e] >= required_bandwidth:
+                    parent[adj] = e
+                    depth[adj] = depth[root] + 1
+                    if adj == destination:
+                        return self._trace(parent, destination)
+                    q.append(adj)
+
+        return None
+
+    def bfs(
+        self,
+        source: int,
+        bandwidth: Residuals,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Run BFS from a given source over the links that have the required
+        bandwidth and return (node id, height) for its reachable nodes.
+        """
+        offsets = self.offsets
+        targets = self.targets
+
+        seen = bytearray(len(self.names))
+        seen[source] = 1
+
+        reachability: typing.List[typing.Tuple[int, int]] = [(source, 0)]
+        # reachability doubles as the BFS queue
+        head = 0
+
+        while head < len(reachability):
+            root, height = reachability[head]
+            head += 1
+
+            if height == max_height:
+                continue
+
+            for e in range(offsets[root], offsets[root + 1]):
+                adj = targets[e]
+                if not seen[adj] and bandwidth[e] >= required_bandwidth:
+                    seen[adj] = 1
+                    reachability.append((adj, height + 1))
+
+        return reachability
+
+    def _trace(self, parent: typing.List[int], node: int) -> typing.List[int]:
+        route: typing.List[int] = []
+        while parent[node] != len(self.targets):
+            e = parent[node]
+            route.append(e)
+            node = self.sources[e]
+        route.reverse()
+        return route
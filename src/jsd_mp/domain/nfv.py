@@ -49,6 +49,25 @@ class Chain:
     def manageable_functions(self) -> typing.Iterable[bool]:
         return map(lambda t: t.manageable, self.functions)
 
+    @property
+    def fingerprint(self) -> typing.Hashable:
+        """
+        The shape of the chain, i.e. the requirements of its functions,
+        the bandwidth of its links and its manageable functions.
+        Chains with the same fingerprint are placed in the same way.
+        """
+        return (
+            tuple(
+                (t.cores, t.memory, t.direction, t.manageable)
+                for t in self.functions
+            ),
+            tuple(
+                (link, self.links[link].bandwidth)
+                for link in sorted(self.links)
+            ),
+            tuple(self.manageable_functions),
+        )
+
     def __len__(self):
         return len(self.functions)
 
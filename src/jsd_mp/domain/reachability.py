@@ -0,0 +1,115 @@
+import typing
+
+from .index import Residuals, TopologyIndex, bits
+
+
+class Reachability:
+    """
+    Reachability answers "is there a path from a to b with at least X
+    bandwidth on each of its links and at most h hops" for a topology.
+
+    For each (X, h) it labels a source with the bitset of nodes that it
+    reaches, so a query is a BFS on its first use and a bit test afterward.
+    The labels are kept consistent with the residual bandwidth: when a link
+    crosses the bandwidth X of a label in either direction, only the labels
+    whose BFS expanded the link's source node are dropped.
+    """
+
+    def __init__(self, index: TopologyIndex):
+        self.index = index
+        # (bandwidth, max_height) -> source -> (reachable, expanded) bitsets
+        self._labels: typing.Dict[
+            typing.Tuple[int, int], typing.Dict[int, typing.Tuple[int, int]]
+        ] = {}
+        # (bandwidth, max_height) -> the number of invalidations that
+        # dropped any of its labels, so the users of the labels can tell
+        # if their results may be stale.
+        self._generations: typing.Dict[typing.Tuple[int, int], int] = {}
+
+    def reachable(
+        self,
+        source: int,
+        bandwidth: Residuals,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> int:
+        """
+        Returns the bitset of nodes that are reachable from source
+        with the required bandwidth in at most max_height hops
+        (-1 means there is no limit).
+        """
+        label = self.label(source, bandwidth, required_bandwidth, max_height)
+        return label[0]
+
+    def label(
+        self,
+        source: int,
+        bandwidth: Residuals,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> typing.Tuple[int, int]:
+        """
+        Returns the label of the source, i.e. the bitset of the nodes that
+        it reaches (see `reachable`) and the bitset of the nodes whose links
+        its BFS expanded. The label only depends on the links of the latter.
+        """
+        labels = self._labels.setdefault((required_bandwidth, max_height), {})
+        label = labels.get(source)
+        if label is None:
+            label = self._label(
+                source, bandwidth, required_bandwidth, max_height
+            )
+            labels[source] = label
+        return label
+
+    def generation(self, required_bandwidth: int, max_height: int = -1) -> int:
+        """
+        Returns the generation of the (required_bandwidth, max_height)
+        labels, it advances when any of them is dropped.
+        """
+        return self._generations.get((required_bandwidth, max_height), 0)
+
+    def invalidate(self, link: int, old: int, new: int):
+        """
+        Drops the labels that may change because the bandwidth of
+        the given link changes from old to new.
+        """
+        low, high = min(old, new), max(old, new)
+        source = self.index.sources[link]
+        for key, labels in self._labels.items():
+            # the link was and remains usable (or unusable) for this label
+            if not low < key[0] <= high:
+                continue
+            dropped = [s for s, (_, e) in labels.items() if e >> source & 1]
+            for s in dropped:
+                del labels[s]
+            if dropped:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _label(
+        self,
+        source: int,
+        bandwidth: Residuals,
+        required_bandwidth: int,
+        max_height: int,
+    ) -> typing.Tuple[int, int]:
+        offsets = self.index.offsets
+        targets = self.index.targets
+
+        reached = 1 << source
+        expanded = 0
+        frontier = reached
+        height = 0
+
+        while frontier and height != max_height:
+            expanded |= frontier
+            reached_next = 0
+            for node in bits(frontier):
+                for e in range(offsets[node], offsets[node + 1]):
+                    if bandwidth[e] >= required_bandwidth:
+                        reached_next |= 1 << targets[e]
+            frontier = reached_next & ~reached
+            reached |= frontier
+            height += 1
+
+        return reached, expanded
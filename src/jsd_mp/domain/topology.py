@@ -1,8 +1,11 @@
+import array
 import typing
 import collections
 import dataclasses
 
 from .direction import Direction
+from .index import Residuals, TopologyIndex
+from .reachability import Reachability
 
 
 @dataclasses.dataclass(frozen=True)
@@ -32,33 +35,137 @@ class Link:
 class Topology:
     """
     Topology class handles the topology with some helpers
+
+    The string-keyed dictionaries are the public face of the topology.
+    Traversals run on its compiled form (see `index`) which interns node
+    names to integer ids and mirrors the residual resources in flat arrays
+    that are kept in sync by `update_node` and `update_link`.
     """
 
     def __init__(self):
         # stores nodes with their name
-        self.nodes: typing.Dict[str, Node] = {}
+        self.nodes: typing.MutableMapping[str, Node] = {}
         # stores connections in adjacency list
         self.connections: typing.Dict[str, typing.List[str]] = {}
         # stores link information of source and destination
-        self.links: typing.Dict[typing.Tuple[str, str], Link] = {}
+        self.links: typing.MutableMapping[typing.Tuple[str, str], Link] = {}
+
+        # compiled form of the topology, it is built on the first use
+        # and dropped whenever a node or a link is added.
+        self._index: typing.Optional[TopologyIndex] = None
+        # residual resources indexed by node id (cores, memory)
+        # and link id (bandwidth).
+        self._cores: array.array = array.array("q")
+        self._memory: array.array = array.array("q")
+        self._bandwidth: array.array = array.array("q")
+        # reachability oracle over the residual bandwidth, created on
+        # the first query.
+        self._reachability: typing.Optional[Reachability] = None
+        # bitsets of the nodes that have at least (cores, memory) residual
+        # resources, they are created on the first query and kept in sync.
+        self._fitting: typing.Dict[typing.Tuple[int, int], int] = {}
+        # the number of the node updates is an epoch of the residual
+        # resources and each updated node (by id) keeps the epoch of its
+        # last update, so they take a slot per node (see `changed`).
+        self._epoch: int = 0
+        self._updated_at: typing.Dict[int, int] = {}
+        # undo journals of the open (nested) transactions, each entry holds
+        # the node name or link and its value before the update.
+        self._journal: typing.List[
+            typing.List[
+                typing.Tuple[
+                    typing.Union[str, typing.Tuple[str, str]],
+                    typing.Union[Node, Link],
+                ]
+            ]
+        ] = []
 
-    def light_copy(self) -> "Topology":
+    @property
+    def index(self) -> TopologyIndex:
         """
-        A cheap copy for resource bookkeeping during placement.
+        The compiled (integer-indexed) form of the topology.
+        """
+        return self.compile()
 
-        `Node` and `Link` are frozen, and the placement code only ever swaps
-        dict entries for new Node/Link objects (via update_node/update_link) --
-        it never mutates an existing one and never touches `connections`. So a
-        shallow copy of the three dicts is sufficient and leaves the original
-        untouched, while avoiding the very expensive deepcopy of every node,
-        link and adjacency list in the inner placement loop.
+    def compile(self) -> TopologyIndex:
+        """
+        Compile the topology, if it isn't compiled already, and return
+        its index.
+        """
+        if self._index is None:
+            index = TopologyIndex(self)
+            self._cores = array.array(
+                "q", (self.nodes[name].cores for name in index.names)
+            )
+            self._memory = array.array(
+                "q", (self.nodes[name].memory for name in index.names)
+            )
+            self._bandwidth = array.array(
+                "q", (self.links[link].bandwidth for link in index.link_names)
+            )
+            self._index = index
+            self._reachability = None
+            self._fitting = {}
+        return self._index
+
+    @property
+    def cores(self) -> array.array:
+        """
+        residual cores of the nodes indexed by their id
         """
+        self.compile()
+        return self._cores
+
+    @property
+    def memory(self) -> array.array:
+        """
+        residual memory of the nodes indexed by their id
+        """
+        self.compile()
+        return self._memory
+
+    @property
+    def bandwidth(self) -> array.array:
+        """
+        residual bandwidth of the links indexed by their id
+        """
+        self.compile()
+        return self._bandwidth
+
+    def residuals(self) -> typing.Tuple[Residuals, Residuals, Residuals]:
+        """
+        The residual cores, memory and bandwidth that the traversals use.
+        """
+        self.compile()
+        return self._cores, self._memory, self._bandwidth
+
+    def copy(self) -> "Topology":
+        """
+        An independent copy of the topology. Nodes and links are frozen and
+        the index is immutable, so only their containers are copied.
+        """
+        index = self.compile()
+
         topo = Topology()
         topo.nodes = dict(self.nodes)
-        topo.connections = self.connections
+        topo.connections = {
+            name: list(adj) for name, adj in self.connections.items()
+        }
         topo.links = dict(self.links)
+        topo._index = index
+        topo._cores = array.array("q", self.cores)
+        topo._memory = array.array("q", self.memory)
+        topo._bandwidth = array.array("q", self.bandwidth)
         return topo
 
+    def overlay(self) -> "TopologyOverlay":
+        """
+        A cheap copy for resource bookkeeping during placement.
+        The overlay records only the updates that are applied on it
+        and leaves this topology untouched.
+        """
+        return TopologyOverlay(self)
+
     def add_node(self, name: str, node: Node):
         """
         Add given node with its name.
@@ -68,6 +175,7 @@ class Topology:
             raise ValueError("node's name must be unique")
         self.nodes[name] = node
         self.connections[name] = []
+        self._index = None
 
     def update_node(self, name: str, node: Node):
         """
@@ -77,7 +185,9 @@ class Topology:
         if name not in self.nodes:
             self.add_node(name, node)
             return
-        self.nodes[name] = node
+        if self._journal:
+            self._journal[-1].append((name, self.nodes[name]))
+        self._set_node(name, node)
 
     def update_link(self, source: str, destination: str, link: Link):
         """
@@ -89,7 +199,65 @@ class Topology:
         if (source, destination) not in self.links:
             self.add_link(source, destination, link)
             return
-        self.links[(source, destination)] = link
+        if self._journal:
+            self._journal[-1].append(
+                ((source, destination), self.links[(source, destination)])
+            )
+        self._set_link((source, destination), link)
+
+    def _set_node(self, name: str, node: Node):
+        self.nodes[name] = node
+        if self._index is not None:
+            i = self._index.ids[name]
+            self._epoch += 1
+            self._updated_at[i] = self._epoch
+            self._cores[i] = node.cores
+            self._memory[i] = node.memory
+            for (cores, memory), mask in self._fitting.items():
+                if node.cores >= cores and node.memory >= memory:
+                    mask |= 1 << i
+                else:
+                    mask &= ~(1 << i)
+                self._fitting[(cores, memory)] = mask
+
+    def _set_link(self, link: typing.Tuple[str, str], value: Link):
+        self.links[link] = value
+        if self._index is not None:
+            e = self._index.link_ids[link]
+            if self._reachability is not None:
+                self._reachability.invalidate(
+                    e, self._bandwidth[e], value.bandwidth
+                )
+            self._bandwidth[e] = value.bandwidth
+
+    def begin(self):
+        """
+        Begin a transaction. Updates of the nodes and links are journaled
+        until the transaction is committed or rolled back, so they can be
+        undone without copying the topology. Transactions can be nested.
+        Please note that adding nodes or links isn't journaled.
+        """
+        self._journal.append([])
+
+    def commit(self):
+        """
+        Commit the current transaction and keep its updates.
+        """
+        journal = self._journal.pop()
+        # the updates of a nested transaction belong to its parent now
+        if self._journal:
+            self._journal[-1].extend(journal)
+
+    def rollback(self):
+        """
+        Rollback the current transaction and undo its updates.
+        """
+        journal = self._journal.pop()
+        for key, value in reversed(journal):
+            if isinstance(key, str) and isinstance(value, Node):
+                self._set_node(key, value)
+            elif isinstance(key, tuple) and isinstance(value, Link):
+                self._set_link(key, value)
 
     def add_link(self, source: str, destination: str, link: Link):
         """
@@ -99,6 +267,7 @@ class Topology:
             raise ValueError("source and destination must be valid nodes")
         self.connections[source].append(destination)
         self.links[(source, destination)] = link
+        self._index = None
 
     def path(
         self,
@@ -107,37 +276,145 @@ class Topology:
         required_bandwidth: int,
         max_height: int = -1,
     ) -> typing.Union[typing.List[typing.Tuple[str, str]], None]:
-        if source not in self.nodes or destination not in self.nodes:
+        """
+        Find the shortest path from source to destination that has the
+        required bandwidth on all of its links. max_height limits the number
+        of hops of the path (-1 means there is no limit).
+        """
+        index = self.index
+        if source not in index.ids or destination not in index.ids:
             raise ValueError("source must be valid nodes")
 
-        # deque for O(1) popleft (a plain list's pop(0) is O(n), making this
-        # BFS O(V^2)); FIFO order is unchanged, so the path returned is identical
-        q: typing.Deque[
-            typing.Tuple[str, typing.List[typing.Tuple[str, str]]]
-        ] = collections.deque([(source, [])])
-        see: typing.Set[str] = set()
+        route = index.path(
+            index.ids[source],
+            index.ids[destination],
+            self.residuals()[2],
+            required_bandwidth,
+            max_height,
+        )
+        if route is None:
+            return None
+        return [index.link_names[e] for e in route]
 
-        while len(q) != 0:
-            root = q.popleft()
-            see.add(root[0])
+    def is_reachable(
+        self,
+        source: str,
+        destination: str,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> bool:
+        """
+        Check there is a path from source to destination with the required
+        bandwidth and at most max_height hops, i.e. `path` doesn't return
+        None, without building the path itself.
+        """
+        index = self.index
+        if source not in index.ids or destination not in index.ids:
+            raise ValueError("source must be valid nodes")
 
-            if root[0] == destination:
-                return root[1]
+        reachable = self.reachable(source, required_bandwidth, max_height)
+        return reachable >> index.ids[destination] & 1 == 1
 
-            if len(root[0]) == max_height:
-                continue
+    def reachable(
+        self,
+        source: str,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> int:
+        """
+        Returns the bitset (over the node ids) of the nodes that are reachable
+        from source with the required bandwidth in at most max_height hops.
+        The bitsets are cached and follow the residual bandwidth changes.
+        """
+        return self.label(source, required_bandwidth, max_height)[0]
 
-            for adj in self.connections[root[0]]:
-                if (
-                    adj not in see
-                    and self.links[(root[0], adj)].bandwidth
-                    >= required_bandwidth
-                ):
-                    path = root[1].copy()
-                    path.append((root[0], adj))
-                    q.append((adj, path))
+    def label(
+        self,
+        source: str,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> typing.Tuple[int, int]:
+        """
+        Returns the reachability label of the source, i.e. the `reachable`
+        bitset and the bitset of the nodes whose links it depends on
+        (see `Reachability.label`).
+        """
+        index = self.index
+        if source not in index.ids:
+            raise ValueError("source must be valid nodes")
+
+        if self._reachability is None:
+            self._reachability = Reachability(index)
+        return self._reachability.label(
+            index.ids[source],
+            self.residuals()[2],
+            required_bandwidth,
+            max_height,
+        )
 
-        return None
+    def reach_generation(
+        self, required_bandwidth: int, max_height: int = -1
+    ) -> int:
+        """
+        The generation of the `reachable` bitsets with the given bandwidth
+        and max_height, it advances when any of them may change.
+        """
+        if self._reachability is None:
+            return 0
+        return self._reachability.generation(required_bandwidth, max_height)
+
+    def fitting(self, cores: int, memory: int) -> int:
+        """
+        Returns the bitset (over the node ids) of the nodes that have at
+        least the given residual cores and memory.
+        """
+        self.compile()
+        mask = self._fitting.get((cores, memory))
+        if mask is None:
+            mask = 0
+            for i, (c, m) in enumerate(zip(self._cores, self._memory)):
+                if c >= cores and m >= memory:
+                    mask |= 1 << i
+            self._fitting[(cores, memory)] = mask
+        return mask
+
+    @property
+    def epoch(self) -> int:
+        """
+        The epoch of the residual resources of the nodes, it advances on
+        every node update (including the rollbacks).
+        """
+        return self._epoch
+
+    def changed(self, since: int) -> int:
+        """
+        Returns the bitset (over the node ids) of the nodes that are
+        updated since the given epoch.
+        """
+        mask = 0
+        for i, epoch in self._updated_at.items():
+            if epoch > since:
+                mask |= 1 << i
+        return mask
+
+    def hop_distance(
+        self, source: str, destination: str
+    ) -> typing.Union[int, None]:
+        """
+        Structural (bandwidth-independent) hop distance from source to
+        destination or None if destination isn't reachable. The distances are
+        computed once for all pairs when the topology is compiled.
+        """
+        index = self.index
+        if source not in index.ids or destination not in index.ids:
+            raise ValueError("source must be valid nodes")
+
+        hops = index.hops[
+            index.ids[source] * len(index) + index.ids[destination]
+        ]
+        if hops == -1:
+            return None
+        return hops
 
     def bfs(
         self,
@@ -150,29 +427,161 @@ class Topology:
         It returns reachability information in the following tuple:
         (node, height)
         """
-        if source not in self.nodes:
+        index = self.index
+        if source not in index.ids:
             raise ValueError("source must be valid nodes")
 
-        q: typing.List[typing.Tuple[str, int]] = [(source, 0)]
-        reachability: typing.List[typing.Tuple[str, int]] = []
-        see: typing.Set[str] = set()
+        return [
+            (index.names[node], height)
+            for node, height in index.bfs(
+                index.ids[source],
+                self.residuals()[2],
+                required_bandwidth,
+                max_height,
+            )
+        ]
 
-        while len(q) != 0:
-            root: typing.Tuple[str, int] = q.pop(0)
-            see.add(root[0])
-            height = root[1]
 
-            reachability.append(root)
+class ResidualLayer:
+    """
+    ResidualLayer is a residual array of an overlay: the values that are
+    updated on the overlay by their id, over the residual values of its
+    base, which are shared and never copied.
+    """
+
+    def __init__(self, base: Residuals):
+        self.base = base
+        self.layer: typing.Dict[int, int] = {}
+
+    def __getitem__(self, i: int) -> int:
+        value = self.layer.get(i)
+        return self.base[i] if value is None else value
 
-            if height == max_height:
-                continue
+    def __setitem__(self, i: int, value: int):
+        self.layer[i] = value
 
-            for adj in self.connections[root[0]]:
-                if (
-                    adj not in see
-                    and self.links[(root[0], adj)].bandwidth
-                    >= required_bandwidth
-                ):
-                    q.append((adj, height + 1))
+    def __len__(self) -> int:
+        return len(self.base)
 
-        return reachability
+    def __iter__(self) -> typing.Iterator[int]:
+        return (self[i] for i in range(len(self)))
+
+
+class TopologyOverlay(Topology):
+    """
+    TopologyOverlay is a copy-on-write layer on top of a base topology.
+
+    It records only the nodes and links that are updated on it and the
+    lookups of other entries fall through to the base, so creating it
+    costs nothing and discarding it is just dropping the reference.
+    The base topology must not change while the overlay is in use.
+    Overlays can be layered on top of each other.
+
+    The overlay shares the structure of its base, so nodes and links can
+    be updated but not added. Its residual arrays are layers over the ones
+    of the base (see `ResidualLayer`) and its reachability labels are the
+    ones of the base, unless an updated link changes them.
+    """
+
+    def __init__(self, base: Topology):
+        super().__init__()
+        self.base = base
+        self.connections = base.connections
+        # the nodes and links that are updated on this layer
+        self._updated_nodes: typing.Dict[str, Node] = {}
+        self._updated_links: typing.Dict[typing.Tuple[str, str], Link] = {}
+        self.nodes = collections.ChainMap(self._updated_nodes, base.nodes)
+        self.links = collections.ChainMap(self._updated_links, base.links)
+
+        self._index = base.compile()
+        cores, memory, bandwidth = base.residuals()
+        self._layers = (
+            ResidualLayer(cores),
+            ResidualLayer(memory),
+            ResidualLayer(bandwidth),
+        )
+
+    @property
+    def updated_nodes(self) -> typing.Mapping[str, Node]:
+        """
+        The nodes that are updated on this layer.
+        """
+        return self._updated_nodes
+
+    @property
+    def updated_links(self) -> typing.Mapping[typing.Tuple[str, str], Link]:
+        """
+        The links that are updated on this layer.
+        """
+        return self._updated_links
+
+    def compile(self) -> TopologyIndex:
+        return self.base.compile()
+
+    def residuals(self) -> typing.Tuple[Residuals, Residuals, Residuals]:
+        return self._layers
+
+    @property
+    def cores(self) -> array.array:
+        return array.array("q", self._layers[0])
+
+    @property
+    def memory(self) -> array.array:
+        return array.array("q", self._layers[1])
+
+    @property
+    def bandwidth(self) -> array.array:
+        return array.array("q", self._layers[2])
+
+    def _set_node(self, name: str, node: Node):
+        self._updated_nodes[name] = node
+        i = self.index.ids[name]
+        self._epoch += 1
+        self._updated_at[i] = self._epoch
+        self._layers[0][i] = node.cores
+        self._layers[1][i] = node.memory
+
+    def _set_link(self, link: typing.Tuple[str, str], value: Link):
+        self._updated_links[link] = value
+        e = self.index.link_ids[link]
+        if self._reachability is not None:
+            self._reachability.invalidate(
+                e, self._layers[2][e], value.bandwidth
+            )
+        self._layers[2][e] = value.bandwidth
+
+    def fitting(self, cores: int, memory: int) -> int:
+        # only the nodes of this layer differ from the base
+        index = self.index
+        mask = self.base.fitting(cores, memory)
+        for name, node in self._updated_nodes.items():
+            if node.cores >= cores and node.memory >= memory:
+                mask |= 1 << index.ids[name]
+            else:
+                mask &= ~(1 << index.ids[name])
+        return mask
+
+    def label(
+        self,
+        source: str,
+        required_bandwidth: int,
+        max_height: int = -1,
+    ) -> typing.Tuple[int, int]:
+        # the label of the base holds unless a link of this layer that
+        # starts on one of its expanded nodes changes its usability.
+        label = self.base.label(source, required_bandwidth, max_height)
+        base = self.base.residuals()[2]
+        bandwidth = self._layers[2]
+        sources = self.index.sources
+        for e, value in bandwidth.layer.items():
+            if (value >= required_bandwidth) != (
+                base[e] >= required_bandwidth
+            ) and label[1] >> sources[e] & 1:
+                return super().label(source, required_bandwidth, max_height)
+        return label
+
+    def add_node(self, name: str, node: Node):
+        raise ValueError("nodes cannot be added to an overlay")
+
+    def add_link(self, source: str, destination: str, link: Link):
+        raise ValueError("links cannot be added to an overlay")
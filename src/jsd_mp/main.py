@@ -6,8 +6,8 @@ Here you can run solvers of this package on your network requests.
 import importlib
 import logging
 import time
-from typing import List, Tuple
-from multiprocessing import Pool
+from typing import Dict, List, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
 import click
 
 from jsd_mp.result import Result, report_csv
@@ -15,15 +15,50 @@ from jsd_mp.domain import Placement, ManagementPlacement
 from jsd_mp.config import load, Config
 
 
+# the state of a pool worker, set by `_initialize`
+_worker: Dict[str, Config] = {}
+
+
+def _initialize(cfg: Config):
+    """
+    Keep the configuration in the pool worker, so the tasks don't carry it.
+    A forked worker inherits it from the main process without pickling.
+    """
+    _worker["cfg"] = cfg
+
+
+def parse(default, value: str):
+    """
+    Convert the value of an option to the type of its default value,
+    booleans are given as true/false (or 1/0, yes/no).
+    """
+    if default is None:
+        return value
+    if isinstance(default, bool):
+        if value.lower() in ("true", "1", "yes"):
+            return True
+        if value.lower() in ("false", "0", "no"):
+            return False
+        raise ValueError(f"{value} is not a boolean")
+    return type(default)(value)
+
+
 def execute(
     run: int,
     name: str,
     options: List[Tuple[str, str]],
-    cfg: Config,
+    cfg: Union[Config, None] = None,
+    time_budget: Union[float, None] = None,
+    consolidate: bool = False,
 ) -> Tuple[Result, List[Tuple[Placement, ManagementPlacement]]]:
     """
-    Execute a solver run into isolated process to improve performance
+    Execute a solver run into isolated process to improve performance.
+    Without a configuration it runs on the one of the pool worker
+    (see `_initialize`).
     """
+    if cfg is None:
+        cfg = _worker["cfg"]
+
     # import solver based on given name, for example in case of bari
     # we import Bari from the jsd_mp.bari package.
     module = importlib.import_module(f"jsd_mp.{name}")
@@ -31,12 +66,20 @@ def execute(
 
     # pass options to the solver.
     # please note that these options are class propeties
-    # on solver.
+    # on solver and their values are converted to the type
+    # of their default value.
     for option, value in options:
-        setattr(solver, option, value)
+        setattr(solver, option, parse(getattr(solver, option, None), value))
+
+    # the budget starts with the run, not when it is queued in the pool.
+    deadline = None
+    if time_budget is not None:
+        deadline = time.monotonic() + time_budget
 
     start = time.time()
-    solver.solve()
+    solver.solve(deadline)
+    if consolidate is True:
+        solver.consolidate()
     end = time.time()
 
     return (
@@ -48,6 +91,13 @@ def execute(
             cost=solver.cost,
             number_of_chains=len(cfg.chains),
             number_of_placed_chains=len(solver.solution),
+            beam_width=getattr(solver, "beam", 0),
+            conflict_rate=getattr(solver, "conflict_rate", 0.0),
+            retry_rate=getattr(solver, "retry_rate", 0.0),
+            iteration_rate=getattr(solver, "iteration_rate", 0.0),
+            deadline_hit=solver.deadline_hit,
+            progress=solver.progress,
+            iterations=solver.iterations,
         ),
         solver.solution,
     )
@@ -93,9 +143,32 @@ def execute(
     "results if there is a randomness in solver",
 )
 @click.option(
-    "--options", type=(str, int), help="solver options", multiple=True
+    "--options", type=(str, str), help="solver options", multiple=True
+)
+@click.option(
+    "--time-budget",
+    "-t",
+    default=None,
+    type=float,
+    help="seconds of each run, the solvers return their best "
+    "placement by then",
+)
+@click.option(
+    "--consolidate",
+    default=False,
+    is_flag=True,
+    help="pack the managers of the solutions into fewer licenses",
 )
-def main(config, verbose, show_placement, solvers, runs, options):
+def main(
+    config,
+    verbose,
+    show_placement,
+    solvers,
+    runs,
+    options,
+    time_budget,
+    consolidate,
+):
     if verbose is True:
         logging.basicConfig(level=logging.INFO)
 
@@ -105,24 +178,28 @@ def main(config, verbose, show_placement, solvers, runs, options):
     print(f"load configuration takes {end - start} seconds")
 
     results: List[Result] = []
-    async_results = []
-
-    with Pool() as pool:
+    futures = []
+
+    # the workers receive the configuration once, instead of each task.
+    # they aren't daemonic, so the solvers can start their own processes
+    # (e.g. `--options stage process`).
+    with ProcessPoolExecutor(
+        initializer=_initialize, initargs=(cfg,)
+    ) as executor:
         for run in range(runs):
             for name in solvers:
-                async_result = pool.apply_async(
+                future = executor.submit(
                     execute,
-                    [
-                        run,
-                        name,
-                        options,
-                        cfg,
-                    ],
+                    run,
+                    name,
+                    options,
+                    time_budget=time_budget,
+                    consolidate=consolidate,
                 )
-                async_results.append(async_result)
+                futures.append(future)
 
-        for async_result in async_results:
-            result, solution = async_result.get()
+        for future in futures:
+            result, solution = future.result()
 
             print()
             print(f"{' run {} '.format(result.run + 1):*^50}")
@@ -146,6 +223,11 @@ def main(config, verbose, show_placement, solvers, runs, options):
                 f"{len(solution)} has been placed"
                 f" successfully from {len(cfg.chains)}"
             )
+            if result.deadline_hit is True:
+                print(
+                    f"the time budget expired after {result.progress:.0%} "
+                    f"of chains and {result.iterations} iterations"
+                )
 
             results.append(result)
 
@@ -1,4 +1,3 @@
-import random
 import itertools
 import typing
 
@@ -9,6 +8,7 @@ from jsd_mp.domain import (
     Chain,
     Topology,
 )
+from jsd_mp.domain.index import bits
 
 
 class Oabu(Abu):
@@ -28,56 +28,35 @@ class Oabu(Abu):
         selects manager from the chain's node then reserves bandwidth
         for its connections.
         if there isn't any node that can be vnfm from the chain we are going
-        to randomly select another node.
+        to randomly select another eligible node.
         """
-        node = ""
-
-        # returns list of the physical nodes that runs manageable functions.
-        # managable functions needs manager and placement only contains
-        # the single chain placement.
-        # we select one of these nodes as chain manager.
-        for _node in set(
+        # the physical nodes that run the manageable functions
+        managed = list(
             itertools.compress(placement.nodes, chain.manageable_functions)
-        ):
-            if self.is_management_resource_available(
-                topology,
-                _node,
-                list(
-                    itertools.compress(
-                        placement.nodes, chain.manageable_functions
-                    )
-                ),
-            ):
+        )
+
+        # the managers that satisfy the radius, capacity and not manager
+        # constraints for the managed nodes, in one lookup of the maintained
+        # index of the solver (or at once for another topology).
+        index = topology.index
+        if topology is self.topology:
+            eligible = self.eligible.get(chain, managed)
+        else:
+            eligible = self.eligible_managers(topology, managed)
+
+        # we select one of the managed nodes as chain manager.
+        for _node in set(managed):
+            if eligible >> index.ids[_node] & 1:
                 node = _node
                 break
         else:
             # we cannot find any node from the chain that support vnfm
-            # lets do some random selection similar
+            # lets select another node randomly similar
             # to what we are doing at tabu search
-            for _ in range(self.n_iter):
-                vnfm = random.choice(
-                    list(
-                        set(topology.nodes)
-                        - set(
-                            itertools.compress(
-                                placement.nodes, chain.manageable_functions
-                            )
-                        )
-                    )
-                )
-                if self.is_management_resource_available(
-                    topology,
-                    vnfm,
-                    list(
-                        itertools.compress(
-                            placement.nodes, chain.manageable_functions
-                        )
-                    ),
-                ):
-                    node = vnfm
-                    break
-            else:
+            others = eligible & ~index.mask(managed)
+            if others == 0:
                 return None
+            node = index.names[self.rng.choice(list(bits(others)))]
 
         paths = []
         for _node in itertools.compress(
@@ -1,15 +1,15 @@
 import typing
-import random
 import math
 import itertools
 
 from jsd_mp.bari import Bari
 from jsd_mp.solver import Solver, Random
+from jsd_mp.solver.multistart import multistart
 from jsd_mp.domain import (
     Placement,
     ManagementPlacement,
 )
-from jsd_mp.config import Config
+from jsd_mp.domain.index import bits
 
 
 class Rari(Solver):
@@ -20,6 +20,11 @@ class Rari(Solver):
     """
 
     n_iter: int = 1000
+    # the number of the improvements from the placement, see `multistart`
+    starts: int = 1
+    # the number of the processes of the multistart, 0 means the number of
+    # CPUs and 1 runs the improvements in process
+    workers: int = 0
 
     def _solve(
         self,
@@ -30,36 +35,27 @@ class Rari(Solver):
 
         rnd_index = math.ceil(len(self.chains) / 3)
 
-        rnd = Random(
-            # mypy defers self.topology's type because it is reassigned from
-            # rnd.topology below; the inherited annotation makes this safe.
-            Config({}, self.chains[:rnd_index], self.vnfm, self.topology)  # type: ignore[has-type]
-        )
-        placements.extend(rnd.solve())
-        for node, count in rnd.manage_by_node.items():
-            self.manage_by_node[node] = count
-        # please note that we need to update the topology
-        # after the random placement
-        self.topology = rnd.topology
+        # the phases place their chains on the rari state in place
+        rnd = self.phase(Random, self.chains[:rnd_index])
+        placements.extend(rnd.solve(self.deadline))
+        self.adopt(rnd)
 
         self.logger.info(
             "Random place %d chains of %d", len(placements), rnd_index
         )
-        placed_chains = [p.chain for (p, _) in placements]
-
-        bari = Bari(
-            Config(
-                {},
-                [chain for chain in self.chains if chain not in placed_chains],
-                self.vnfm,
-                self.topology,
-            )
+        placed_chains = {p.chain for (p, _) in placements}
+
+        bari = self.phase(
+            Bari,
+            [chain for chain in self.chains if chain not in placed_chains],
         )
-        placements.extend(bari.solve())
-        for node, count in bari.manage_by_node.items():
-            self.manage_by_node[node] = (
-                self.manage_by_node.get(node, 0) + count
-            )
+        placements.extend(bari.solve(self.deadline))
+        self.adopt(bari)
+
+        # the chains of the random placement are considered again by bari
+        # if they aren't placed.
+        self.considered = len(placed_chains) + bari.considered
+        self.deadline_hit = rnd.deadline_hit or bari.deadline_hit
 
         self.logger.info(
             "Bari place %d chains of remaining %d",
@@ -67,63 +63,52 @@ class Rari(Solver):
             len(self.chains) - len(placed_chains),
         )
 
+        return multistart(self, placements, self.starts, self.workers)
+
+    def improve(
+        self,
+        placements: typing.List[typing.Tuple[Placement, ManagementPlacement]],
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        improve the manager placement with random moves that are kept
+        if they don't increase the cost.
+        """
+        index = self.topology.index
+
         # in each iteration we try to improve the manager placement
         for _ in range(self.n_iter):
-            current_cost = self.cost
+            if self.expired() or len(placements) == 0:
+                break
+            self.iterations += 1
 
             # randomly switch chains between vnfms
-            index = random.randint(0, len(placements) - 1)
-            p, mp = placements[index]
-            # each node can be a manager if it has the required resources
-            vnfm = random.choice(
-                list(
-                    set(self.topology.nodes)
-                    - (set(mp.management_node) if mp is not None else set())
-                )
-            )
-
-            # revert the current manager placement
-            self.revert_management(mp)
-
-            # find new manager placement
+            i = self.rng.randint(0, len(placements) - 1)
+            p, mp = placements[i]
             manageable_functions = list(
                 itertools.compress(p.nodes, p.chain.manageable_functions)
             )
-            if self.is_management_resource_available(
-                self.topology, vnfm, manageable_functions
-            ):
-                paths = []
-                for n in manageable_functions:
-                    path = self.topology.path(vnfm, n, self.vnfm.bandwidth)
-                    if path is not None:
-                        paths.append(path)
-                new_mp = ManagementPlacement(p.chain, self.vnfm, vnfm, paths)
-
-                # apply new manager placement
-                self.apply_management(new_mp)
-
-                if self.cost > current_cost:
-                    self.revert_management(new_mp)
-                    self.apply_management(mp)
-                else:
-                    # update the placement
-                    placements[index] = (
-                        p,
-                        new_mp,
-                    )
-            else:
-                self.apply_management(mp)
 
-        return placements
+            # the new manager is drawn from the eligible managers of
+            # the chain. They are eligible with its current management
+            # and reverting it only frees resources.
+            eligible = self.eligible.get(p.chain, manageable_functions) & ~(
+                1 << index.ids[mp.management_node]
+            )
+            if eligible == 0:
+                continue
+            vnfm = index.names[self.rng.choice(list(bits(eligible)))]
+
+            # the cost of the move is known before applying it,
+            # so only the moves that don't increase it are applied.
+            n = len(manageable_functions)
+            delta = self.license_delta(
+                mp.management_node, -n
+            ) + self.license_delta(vnfm, n)
+            if delta * self.vnfm.license_cost > 0:
+                continue
+
+            placements[i] = (
+                p, self.reassign(p, mp, vnfm, manageable_functions)
+            )
 
-    def apply_management(self, mp: ManagementPlacement):
-        mp.apply_on_topology(self.topology)
-        self.manage_by_node[mp.management_node] = self.manage_by_node.get(
-            mp.management_node, 0
-        ) + len(mp.management_links)
-
-    def revert_management(self, mp: ManagementPlacement):
-        mp.revert_on_topology(self.topology)
-        self.manage_by_node[mp.management_node] = self.manage_by_node.get(
-            mp.management_node, 0
-        ) - len(mp.management_links)
+        return placements
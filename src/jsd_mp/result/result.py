@@ -14,6 +14,14 @@ class Result(NamedTuple):
     number_of_chains: int
     solver: str
     elapsed_time: float
+    beam_width: int = 0  # beam width of the bari placement, 0 means exact
+    # rates of the conflicts and retries of the speculative admission
+    conflict_rate: float = 0.0
+    retry_rate: float = 0.0
+    iteration_rate: float = 0.0  # iterations per second of the tabu search
+    deadline_hit: bool = False  # the run is stopped by its time budget
+    progress: float = 1.0  # rate of the chains that the placement considered
+    iterations: int = 0  # iterations of the improvement phase
 
 
 def report_csv(results: List[Result]):
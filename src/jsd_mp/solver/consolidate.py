@@ -0,0 +1,119 @@
+"""
+License consolidation of the placed chains.
+
+The manager assignment of the placed chains is a bin packing: the vnfms of
+the managers are the bins, each one has the vnfm capacity, and the managed
+functions of the chains are the items, that can go only to their eligible
+managers. The consolidation empties the last vnfm of the least filled
+managers into the spare capacity of the others, so it runs after any solver
+and it never adds a license.
+"""
+import heapq
+import itertools
+import typing
+
+from jsd_mp.domain import Placement, ManagementPlacement
+from jsd_mp.domain.index import bits
+
+if typing.TYPE_CHECKING:
+    from .solver import Solver
+
+Placements = typing.List[typing.Tuple[Placement, ManagementPlacement]]
+
+
+def consolidate(solver: "Solver", placements: Placements) -> Placements:
+    """
+    Move the chains of the given (applied) placements between their
+    eligible managers to release vnfm licenses and return the placements.
+
+    The managers are visited in a priority queue by the number of the
+    functions on their last vnfm, the least filled first. The chains of
+    a manager, the largest first, are moved to the eligible managers that
+    have spare capacity for them, the one with the least spare capacity
+    first (best fit), until its last vnfm is empty. If the chains don't
+    fit the moves are rolled back, so each committed round releases
+    at least a license. The consolidation stops when the deadline of the
+    solver expires.
+    """
+    placements = list(placements)
+    capacity = solver.vnfm.capacity
+    index = solver.topology.index
+
+    # the managed nodes of each chain
+    managed = [
+        list(itertools.compress(p.nodes, p.chain.manageable_functions))
+        for p, _ in placements
+    ]
+    # manager -> the chains that it manages
+    chains: typing.Dict[str, typing.Set[int]] = {}
+    for i, (_, mp) in enumerate(placements):
+        chains.setdefault(mp.management_node, set()).add(i)
+
+    def last(node: str) -> int:
+        # the number of the functions on the last vnfm of the node
+        count = solver.manage_by_node.get(node, 0)
+        return count - capacity * ((count - 1) // capacity) if count else 0
+
+    def room(manager: int) -> int:
+        # the spare capacity of the vnfms of the manager
+        return -solver.manage_by_node.get(index.names[manager], 0) % capacity
+
+    # (functions on the last vnfm, manager), each manager is in the queue
+    # at most once and the receivers are updated when they are popped.
+    queue = [(last(node), node) for node in chains if last(node)]
+    heapq.heapify(queue)
+
+    licenses = solver.licenses
+    moves = 0
+    while queue and not solver.expired():
+        functions, donor = heapq.heappop(queue)
+        if functions != last(donor):
+            if last(donor):
+                heapq.heappush(queue, (last(donor), donor))
+            continue
+
+        solver.begin()
+        moved: typing.List[typing.Tuple[int, ManagementPlacement]] = []
+        released = 0
+        for i in sorted(
+            chains[donor],
+            key=lambda i: (-len(placements[i][1].management_links), i),
+        ):
+            if released >= functions:
+                break
+            p, mp = placements[i]
+            if not managed[i]:
+                continue
+            receivers = (
+                solver.eligible.get(p.chain, managed[i])
+                & solver.spare(len(managed[i]))
+                & ~(1 << index.ids[donor])
+            )
+            if receivers == 0:
+                continue
+            receiver = min(bits(receivers), key=lambda j: (room(j), j))
+            moved.append(
+                (i, solver.reassign(p, mp, index.names[receiver], managed[i]))
+            )
+            released += len(mp.management_links)
+
+        if released < functions:
+            solver.rollback()
+            continue
+
+        solver.commit()
+        for i, mp in moved:
+            chains[placements[i][1].management_node].discard(i)
+            chains.setdefault(mp.management_node, set()).add(i)
+            placements[i] = (placements[i][0], mp)
+        moves += len(moved)
+        if last(donor):
+            heapq.heappush(queue, (last(donor), donor))
+
+    solver.logger.info(
+        "consolidation: %d licenses to %d with %d moves",
+        licenses,
+        solver.licenses,
+        moves,
+    )
+    return placements
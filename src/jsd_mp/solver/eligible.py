@@ -0,0 +1,77 @@
+import typing
+
+from jsd_mp.domain import Chain, Topology
+from jsd_mp.domain.index import bits
+
+if typing.TYPE_CHECKING:
+    from .solver import Solver
+
+
+class EligibleManagers:
+    """
+    EligibleManagers maintains the eligible managers of the placed chains
+    of a solver, so the improvement moves are drawn only from the managers
+    that can take the chain.
+
+    The eligibility of a manager (see `Solver.eligible_managers`) has a part
+    that depends on the chain, i.e. the radius of the manager must contain
+    all of the chain's managed nodes and the manager must not be one of their
+    notManagerNodes, and a part that depends only on the manager, i.e. its
+    resources and its management count. The chain part is kept for each
+    chain and it is computed again only when the radius of the managers
+    may have changed (see `Topology.reach_generation`). The manager part is
+    made of the bitsets that the topology and the solver keep in sync
+    (`Topology.fitting` and `Solver.spare`).
+    """
+
+    def __init__(self, solver: "Solver"):
+        self.solver = solver
+        # chain -> (topology, generation, managed nodes, covering managers)
+        self._covers: typing.Dict[
+            Chain, typing.Tuple[Topology, int, int, int]
+        ] = {}
+        # number of the computations of the chain parts
+        self.updates: int = 0
+
+    def covers(self, chain: Chain, nodes: typing.List[str]) -> int:
+        """
+        Returns the bitset of the managers that have the given (managed)
+        nodes of the chain within their radius and aren't one of their
+        notManagerNodes.
+        """
+        topology = self.solver.topology
+        vnfm = self.solver.vnfm
+        index = topology.index
+        generation = topology.reach_generation(vnfm.bandwidth, vnfm.radius)
+        managed = index.mask(nodes)
+
+        key = (topology, generation, managed)
+        cached = self._covers.get(chain)
+        if cached is not None and cached[:3] == key:
+            return cached[3]
+
+        self.updates += 1
+        covers = (1 << len(index)) - 1
+        for node in nodes:
+            covers &= ~index.not_managers[index.ids[node]]
+
+        for manager in bits(covers):
+            ball = topology.reachable(
+                index.names[manager], vnfm.bandwidth, max_height=vnfm.radius
+            )
+            if managed & ~ball:
+                covers &= ~(1 << manager)
+
+        self._covers[chain] = (topology, generation, managed, covers)
+        return covers
+
+    def get(self, chain: Chain, nodes: typing.List[str]) -> int:
+        """
+        Returns the bitset of the eligible managers of the given (managed)
+        nodes of the chain on the solver topology.
+        """
+        vnfm = self.solver.vnfm
+        return (
+            self.solver.topology.fitting(vnfm.cores, vnfm.memory)
+            | self.solver.spare(len(nodes))
+        ) & self.covers(chain, nodes)
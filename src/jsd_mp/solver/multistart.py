@@ -0,0 +1,245 @@
+"""
+Multi-start of the solvers' improvement phase.
+
+The improvement (see `Solver.improve`) is repeated from the same placement
+with independent random streams and the best result is kept.
+"""
+import abc
+import logging
+import multiprocessing
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+from jsd_mp.domain import Placement, ManagementPlacement, Topology, VNFM
+from jsd_mp.config import Config
+
+if typing.TYPE_CHECKING:
+    from .solver import Solver
+
+Placements = typing.List[typing.Tuple[Placement, ManagementPlacement]]
+
+# the managers of the chains as (management node, management links)
+Managements = typing.List[
+    typing.Tuple[str, typing.List[typing.List[typing.Tuple[str, str]]]]
+]
+
+
+def managements(placements: Placements) -> Managements:
+    return [(mp.management_node, mp.management_links) for _, mp in placements]
+
+
+class MultiStart(abc.ABC):
+    """
+    MultiStart runs the improvements of a solver from its current state,
+    one for each seed, and returns their licenses and managers. The solver
+    state is left untouched.
+    """
+
+    @abc.abstractmethod
+    def search(
+        self,
+        solver: "Solver",
+        placements: Placements,
+        seeds: typing.List[int],
+    ) -> typing.List[typing.Tuple[int, Managements]]:
+        pass
+
+    def close(self):
+        """
+        Release the resources of the multi-start, e.g. its worker processes.
+        """
+
+
+class SerialMultiStart(MultiStart):
+    """
+    SerialMultiStart runs the improvements one by one in the solver itself,
+    each one in a transaction that is rolled back.
+    """
+
+    def search(
+        self,
+        solver: "Solver",
+        placements: Placements,
+        seeds: typing.List[int],
+    ) -> typing.List[typing.Tuple[int, Managements]]:
+        results = []
+        for seed in seeds:
+            solver.begin()
+            with solver.reseeded(seed):
+                improved = solver.improve(list(placements))
+            results.append((solver.licenses, managements(improved)))
+            solver.rollback()
+
+        return results
+
+
+# the solver of a worker process, set by `_initialize`
+_worker: typing.Dict[str, typing.Any] = {}
+
+
+def _initialize(
+    solver: typing.Type["Solver"],
+    vnfm: VNFM,
+    topology: Topology,
+    placements: Placements,
+    manage_by_node: typing.Dict[str, int],
+    options: typing.Dict[str, typing.Any],
+):
+    worker = solver(Config({}, [], vnfm, topology))
+    for option, value in options.items():
+        setattr(worker, option, value)
+    worker.reset_management(manage_by_node)
+    _worker.update(solver=worker, placements=placements)
+
+
+def _search(
+    seed: int,
+) -> typing.Tuple[int, Managements, typing.Dict[str, float], bool]:
+    """
+    Improve the initial state with the given seed and roll it back.
+    The changes of the solver counters are returned with the result.
+    """
+    solver: "Solver" = _worker["solver"]
+    counters = solver.counters()
+
+    solver.begin()
+    with solver.reseeded(seed):
+        improved = solver.improve(list(_worker["placements"]))
+    licenses = solver.licenses
+    solver.rollback()
+
+    changes = {
+        counter: value - counters[counter]
+        for counter, value in solver.counters().items()
+    }
+    return licenses, managements(improved), changes, solver.deadline_hit
+
+
+class ProcessMultiStart(MultiStart):
+    """
+    ProcessMultiStart runs the improvements in worker processes. Each
+    worker gets the state of the solver once, i.e. its topology, its
+    placements and its management counts, and runs each search in
+    a transaction that is rolled back, so a task carries only its seed and
+    it returns only the managers. The counters of the searches (e.g. the
+    iterations) and their deadline are added to the solver.
+
+    Processes cannot be started from a daemon process (e.g. a worker of a
+    `multiprocessing.Pool`), so there it falls back to `SerialMultiStart`.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = logging.getLogger(__name__)
+        self.executor: typing.Union[ProcessPoolExecutor, None] = None
+        self.fallback: typing.Union[MultiStart, None] = None
+
+    def search(
+        self,
+        solver: "Solver",
+        placements: Placements,
+        seeds: typing.List[int],
+    ) -> typing.List[typing.Tuple[int, Managements]]:
+        if self.fallback is None and multiprocessing.current_process().daemon:
+            self.logger.warning(
+                "processes cannot be started in a daemon process, "
+                "the improvements run in process"
+            )
+            self.fallback = SerialMultiStart()
+        if self.fallback is not None:
+            return self.fallback.search(solver, placements, seeds)
+
+        # the options are the annotated class attributes of the solver
+        options = {
+            option: getattr(solver, option)
+            for cls in type(solver).__mro__
+            for option in vars(cls).get("__annotations__", {})
+            if option in vars(cls)
+        }
+        # the deadline is in the system-wide monotonic clock
+        options["deadline"] = solver.deadline
+        self.executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(seeds)),
+            initializer=_initialize,
+            initargs=(
+                type(solver),
+                solver.vnfm,
+                solver.topology,
+                placements,
+                solver.manage_by_node,
+                options,
+            ),
+        )
+
+        results = []
+        for licenses, best, changes, deadline_hit in self.executor.map(
+            _search, seeds
+        ):
+            for counter, change in changes.items():
+                setattr(solver, counter, getattr(solver, counter) + change)
+            solver.deadline_hit = solver.deadline_hit or deadline_hit
+            results.append((licenses, best))
+        return results
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def multistart(
+    solver: "Solver",
+    placements: Placements,
+    starts: int,
+    workers: int,
+) -> Placements:
+    """
+    Improve the placements of the solver from `starts` independent starts
+    and apply the best one (the fewest licenses, the earliest on ties) on
+    the solver. Each start has its own random stream seeded from the
+    solver's generator. The starts run in `workers` processes, 1 runs them
+    in process. A single start is the improvement itself.
+    """
+    if starts <= 1:
+        return solver.improve(placements)
+
+    if workers == 1:
+        runner: MultiStart = SerialMultiStart()
+    else:
+        runner = ProcessMultiStart(workers)
+
+    seeds = [solver.rng.getrandbits(64) for _ in range(starts)]
+    try:
+        results = runner.search(solver, placements, seeds)
+    finally:
+        runner.close()
+
+    licenses, best = min(
+        enumerate(results), key=lambda result: (result[1][0], result[0])
+    )[1]
+    solver.logger.info(
+        "multistart: %d starts reach %s licenses, the best is %d",
+        starts,
+        sorted(result[0] for result in results),
+        licenses,
+    )
+
+    # apply the best managers, all of the changed managements are reverted
+    # first so the new ones are applied on their own topology.
+    placements = list(placements)
+    changed = [
+        i
+        for i, ((_, mp), management) in enumerate(zip(placements, best))
+        if (mp.management_node, mp.management_links) != management
+    ]
+    for i in changed:
+        solver.revert_management(placements[i][1])
+    for i in changed:
+        p, _ = placements[i]
+        node, links = best[i]
+        mp = ManagementPlacement(p.chain, solver.vnfm, node, links)
+        solver.apply_management(mp)
+        placements[i] = (p, mp)
+
+    return placements
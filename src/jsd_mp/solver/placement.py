@@ -29,10 +29,9 @@ class PartialPlacement(Placement):
         return copy.deepcopy(self)
 
     def apply_on_topology(self, topology: Topology) -> Topology:
-        # light_copy (shallow dict copy) instead of deepcopy: callers only read
-        # the result, and super().apply_on_topology swaps dict entries for new
-        # frozen Node/Link objects rather than mutating the originals.
-        topo = topology.light_copy()
+        # the overlay only records the updates of this placement,
+        # so the given topology is untouched and nothing is copied.
+        topo = topology.overlay()
 
         super().apply_on_topology(topo)
 
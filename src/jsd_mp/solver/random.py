@@ -1,5 +1,4 @@
 import typing
-import random
 import itertools
 
 from jsd_mp.domain import (
@@ -24,6 +23,10 @@ class Random(Solver):
         ] = []
 
         for chain in self.chains:
+            if self.expired():
+                break
+            self.considered += 1
+
             topology = self.topology
             pp = PartialPlacement(chain)
 
@@ -44,7 +47,7 @@ class Random(Solver):
                 if len(candidates) == 0:
                     break
 
-                n: str = random.choice(candidates)
+                n: str = self.rng.choice(candidates)
 
                 if self.is_resource_available(
                     topology,
@@ -71,7 +74,7 @@ class Random(Solver):
             else:
                 # here we have placed all chains' functions
                 # let's place manager for the chain
-                management_node: str = random.choice(
+                management_node: str = self.rng.choice(
                     [
                         name
                         for (name, node) in topology.nodes.items()
@@ -107,12 +110,7 @@ class Random(Solver):
                     mp = ManagementPlacement(
                         chain, self.vnfm, management_node, management_paths
                     )
-                    self.manage_by_node[
-                        management_node
-                    ] = self.manage_by_node.get(management_node, 0) + sum(
-                        chain.manageable_functions
-                    )
-                    mp.apply_on_topology(self.topology)
+                    self.apply_management(mp)
                     placements.append((p, mp))
 
         return placements
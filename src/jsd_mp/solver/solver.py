@@ -1,10 +1,13 @@
 import abc
+import contextlib
 import typing
-import copy
 import math
+import time
+import random
 import logging
 
 from jsd_mp.domain import (
+    Chain,
     Placement,
     ManagementPlacement,
     Topology,
@@ -12,8 +15,14 @@ from jsd_mp.domain import (
     Type,
     Direction,
 )
+from jsd_mp.domain.index import bits
 from jsd_mp.config import Config
 
+from .eligible import EligibleManagers
+from .consolidate import consolidate
+
+S = typing.TypeVar("S", bound="Solver")
+
 
 class Solver(abc.ABC):
     """
@@ -23,30 +32,71 @@ class Solver(abc.ABC):
     Paths have direction and management paths goes from manager to nodes.
     """
 
-    def __init__(self, config: Config):
+    # seed of the solver random number generator (see `rng`),
+    # -1 seeds it from the `random` module.
+    seed: int = -1
+
+    def __init__(
+        self, config: Config, parent: typing.Union["Solver", None] = None
+    ):
         self.chains = config.chains
         self.vnfm = config.vnfm
-        # explicit annotation: subclasses (e.g. Rari) reassign self.topology,
-        # which otherwise leaves mypy unable to infer the attribute's type.
-        self.topology: Topology = copy.deepcopy(config.topology)
+        self.topology: Topology
+        if parent is None:
+            # compile the configuration topology before copying it, so the
+            # solvers of a configuration share its index (e.g. hop distances).
+            config.topology.compile()
+            self.topology = config.topology.copy()
+        else:
+            # a phase of the parent solver works on its state, see `phase`.
+            self.topology = parent.topology
 
         self.logger: logging.Logger = logging.getLogger(__name__)
 
         # number of the functions that are managed by an specific node
         self.manage_by_node: typing.Dict[str, int] = {}
+        # undo journals of manage_by_node for the open transactions,
+        # each one holds the counts before their first update.
+        self._manage_journal: typing.List[
+            typing.Dict[str, typing.Union[int, None]]
+        ] = []
+        # bitsets of the nodes that can manage a number of functions more
+        # without an additional vnfm, they are created on the first query
+        # and kept in sync with the counts (see `spare`).
+        self._spare: typing.Dict[int, int] = {}
+        # the eligible managers of the placed chains
+        self.eligible: EligibleManagers = EligibleManagers(self)
 
-        # cache of structural (bandwidth-independent) shortest-path hop counts
-        # between node pairs. The topology's connections never change during a
-        # solve, so these are constant and worth memoizing across the hot loop.
-        self.struct_path_len: typing.Dict[
-            typing.Tuple[str, str], int
-        ] = {}
+        # the objective is maintained with the management counts, so reading
+        # it doesn't scan the topology or the solution: the number of vnfm
+        # licenses and the fees of the managed (i.e. placed) chains.
+        self._licenses: int = 0
+        self._revenue: int = 0
+        # the objective before each of the open transactions
+        self._objective_journal: typing.List[typing.Tuple[int, int]] = []
+
+        self._rng: typing.Union[random.Random, None] = None
+
+        if parent is not None:
+            self.manage_by_node = parent.manage_by_node
+            self._spare = parent._spare
+            self.eligible = parent.eligible
+            self._rng = parent.rng
 
         self.solved: bool = False
         self.solution: typing.List[
             typing.Tuple[Placement, ManagementPlacement]
         ] = []
 
+        # the deadline of the solve (in `time.monotonic` seconds)
+        # and whether the solver stopped because of it.
+        self.deadline: typing.Union[float, None] = None
+        self.deadline_hit: bool = False
+        # the progress of the search: the number of the chains that the
+        # placement considered and the iterations of the improvement.
+        self.considered: int = 0
+        self.iterations: int = 0
+
     @abc.abstractmethod
     def _solve(
         self,
@@ -55,36 +105,263 @@ class Solver(abc.ABC):
 
     def solve(
         self,
+        deadline: typing.Union[float, None] = None,
     ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
         """
-        Solve the given JSD-MP problem return the placement
+        Solve the given JSD-MP problem return the placement.
+        Given a deadline (in `time.monotonic` seconds) the solver stops
+        admitting chains and improving its placement when it expires and
+        it returns the solution that it has by then.
         """
         self.logger.info("%s Started", self.__class__.__name__)
+        self.deadline = deadline
         if self.solved is False:
             self.solution = self._solve()
         return self.solution
 
+    def expired(self) -> bool:
+        """
+        Check if the deadline of the solve is expired.
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            if not self.deadline_hit:
+                self.logger.info(
+                    "%s hit its deadline", self.__class__.__name__
+                )
+            self.deadline_hit = True
+        return self.deadline_hit
+
+    @property
+    def progress(self) -> float:
+        """
+        The rate of the chains that the placement considered.
+        """
+        return self.considered / len(self.chains) if self.chains else 1.0
+
+    def improve(
+        self,
+        placements: typing.List[typing.Tuple[Placement, ManagementPlacement]],
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        Improve the manager placement of the given (applied) placements
+        on the solver state and return them. It is the phase that is
+        repeated from the same state by `multistart`, the solvers without
+        one return the placements as they are.
+        """
+        return placements
+
+    def counters(self) -> typing.Dict[str, float]:
+        """
+        The counters that the improvement updates, they are added up over
+        the starts of `multistart` that run in other processes.
+        """
+        return {"iterations": self.iterations}
+
     @property
     def cost(self):
         """
         Calculate the cost of the solution.
         """
-        cost = 0
-        for manager in self.topology.nodes:
-            cost += math.ceil(
-                self.manage_by_node.get(manager, 0) / self.vnfm.capacity
-            )
-        return cost * self.vnfm.license_cost
+        return self._licenses * self.vnfm.license_cost
 
     @property
     def profit(self):
         """
         Calculate the profit of the solution.
         """
-        profit = 0
-        for (p, mp) in self.solution:
-            profit += p.chain.fee
-        return profit
+        return self._revenue
+
+    @property
+    def licenses(self) -> int:
+        """
+        The number of vnfm licenses of the current management counts.
+        """
+        return self._licenses
+
+    def license_delta(self, node: str, functions: int) -> int:
+        """
+        Returns the change in the number of licenses if the given number of
+        functions is added to (or removed from) the ones managed by the node,
+        so a move is evaluated without applying it.
+        """
+        count = self.manage_by_node.get(node, 0)
+        capacity = self.vnfm.capacity
+        return math.ceil((count + functions) / capacity) - math.ceil(
+            count / capacity
+        )
+
+    @property
+    def rng(self) -> random.Random:
+        """
+        The random number generator of the solver. It is created on the first
+        use, so the seed can be given as an option after the construction.
+        """
+        if self._rng is None:
+            self._rng = random.Random(
+                self.seed if self.seed >= 0 else random.getrandbits(64)
+            )
+        return self._rng
+
+    @contextlib.contextmanager
+    def reseeded(self, seed: int) -> typing.Iterator[None]:
+        """
+        Use a random stream with the given seed within the context, e.g. for
+        a start of `multistart`, and then restore the solver's generator.
+        """
+        rng = self._rng
+        self._rng = random.Random(seed)
+        try:
+            yield
+        finally:
+            self._rng = rng
+
+    def begin(self):
+        """
+        Begin a transaction on the solver topology and management counts,
+        so a placement or a management can be tried in place and rolled
+        back without copying the topology.
+        """
+        self.topology.begin()
+        self._manage_journal.append({})
+        self._objective_journal.append((self._licenses, self._revenue))
+
+    def commit(self):
+        """
+        Commit the current transaction.
+        """
+        self.topology.commit()
+        journal = self._manage_journal.pop()
+        self._objective_journal.pop()
+        if self._manage_journal:
+            for node, count in journal.items():
+                self._manage_journal[-1].setdefault(node, count)
+
+    def rollback(self):
+        """
+        Rollback the current transaction.
+        """
+        self.topology.rollback()
+        for node, count in self._manage_journal.pop().items():
+            self._set_managed(node, count)
+        self._licenses, self._revenue = self._objective_journal.pop()
+
+    def manage(self, node: str, functions: int):
+        """
+        Add the given number of functions to the ones managed by the node.
+        """
+        if self._manage_journal:
+            self._manage_journal[-1].setdefault(
+                node, self.manage_by_node.get(node)
+            )
+        self._licenses += self.license_delta(node, functions)
+        self._set_managed(node, self.manage_by_node.get(node, 0) + functions)
+
+    def _set_managed(self, node: str, count: typing.Union[int, None]):
+        if count is None:
+            del self.manage_by_node[node]
+        else:
+            self.manage_by_node[node] = count
+        if self._spare:
+            i = self.topology.index.ids[node]
+            for functions, mask in self._spare.items():
+                if self.license_delta(node, functions) == 0:
+                    mask |= 1 << i
+                else:
+                    mask &= ~(1 << i)
+                self._spare[functions] = mask
+
+    def spare(self, functions: int) -> int:
+        """
+        Returns the bitset (over the node ids) of the nodes whose vnfms can
+        manage the given number of functions more, i.e. they don't need
+        an additional vnfm (license) for them.
+        """
+        mask = self._spare.get(functions)
+        if mask is None:
+            mask = 0
+            for i, name in enumerate(self.topology.index.names):
+                if self.license_delta(name, functions) == 0:
+                    mask |= 1 << i
+            self._spare[functions] = mask
+        return mask
+
+    def reset_management(self, manage_by_node: typing.Dict[str, int]):
+        """
+        Replace the management counts, e.g. with the ones of another solver.
+        They are replaced in place, so the phases keep sharing them (see
+        `phase`). The revenue is left untouched.
+        """
+        counts = dict(manage_by_node)
+        self.manage_by_node.clear()
+        self.manage_by_node.update(counts)
+        self._spare.clear()
+        self._licenses = sum(
+            math.ceil(count / self.vnfm.capacity)
+            for count in self.manage_by_node.values()
+        )
+
+    def phase(self, solver: typing.Type[S], chains: typing.List[Chain]) -> S:
+        """
+        Create a solver of the given type for a phase of this one on
+        the given chains, e.g. Rari places its chains with Random and then
+        with Bari. The phase works on the state of this solver in place:
+        it shares the topology, the management counts, their indexes
+        (see `spare` and `eligible`) and the random number generator,
+        so nothing is copied between the phases. Its objective is added
+        to this solver with `adopt` after it is solved.
+        """
+        return solver(Config({}, chains, self.vnfm, self.topology), self)
+
+    def adopt(self, phase: "Solver"):
+        """
+        Add the objective of a solved phase (see `phase`) to this solver.
+        The phase only adds its changes on the shared counts, so its license
+        count and revenue are the changes of the objective.
+        """
+        self._licenses += phase._licenses
+        self._revenue += phase._revenue
+
+    def apply_management(self, mp: ManagementPlacement):
+        mp.apply_on_topology(self.topology)
+        self.manage(mp.management_node, len(mp.management_links))
+        self._revenue += mp.chain.fee
+
+    def revert_management(self, mp: ManagementPlacement):
+        mp.revert_on_topology(self.topology)
+        self.manage(mp.management_node, -len(mp.management_links))
+        self._revenue -= mp.chain.fee
+
+    def reassign(
+        self,
+        placement: Placement,
+        mp: ManagementPlacement,
+        manager: str,
+        nodes: typing.List[str],
+    ) -> ManagementPlacement:
+        """
+        Move the management of a placed chain to the given manager, which
+        must be eligible for its (managed) nodes, and return the new
+        management placement.
+        """
+        self.revert_management(mp)
+        paths = []
+        for node in nodes:
+            path = self.topology.path(manager, node, self.vnfm.bandwidth)
+            if path is not None:
+                paths.append(path)
+        new = ManagementPlacement(placement.chain, self.vnfm, manager, paths)
+        self.apply_management(new)
+        return new
+
+    def consolidate(
+        self,
+    ) -> typing.List[typing.Tuple[Placement, ManagementPlacement]]:
+        """
+        Pack the managers of the solution into fewer licenses,
+        see `consolidate.consolidate`.
+        """
+        self.solution = consolidate(self, self.solution)
+        return self.solution
 
     def is_management_resource_available(
         self,
@@ -110,33 +387,71 @@ class Solver(abc.ABC):
             if node.cores < self.vnfm.cores:
                 return False
 
-        r = topology.bfs(
+        # the nodes within the radius of the manager over the links that
+        # have the management bandwidth, it must contain all of the nodes.
+        ball = topology.reachable(
             manager, self.vnfm.bandwidth, max_height=self.vnfm.radius
         )
-
-        for _node in nodes:
-            for (destination, height) in r:
-                if destination == _node and height <= self.vnfm.radius:
-                    break
-            else:
-                self.logger.info(
-                    "fail to use %s as a manager because of radius", manager
-                )
-                return False
+        if topology.index.mask(nodes) & ~ball:
+            self.logger.info(
+                "fail to use %s as a manager because of radius", manager
+            )
+            return False
 
         # check the not manager nodes constraints
         # if the manager exists at least in the one the
         # nodes' not_manager_nodes
         # then it cannot manage the given chain.
+        index = topology.index
+        not_managers = 0
         for _node in nodes:
-            if manager in topology.nodes[_node].not_manager_nodes:
-                self.logger.info(
-                    "fail to use %s as a manager because of not_manager_nodes",
-                    manager,
-                )
-                return False
+            not_managers |= index.not_managers[index.ids[_node]]
+        if not_managers >> index.ids[manager] & 1:
+            self.logger.info(
+                "fail to use %s as a manager because of not_manager_nodes",
+                manager,
+            )
+            return False
         return True
 
+    def eligible_managers(
+        self,
+        topology: Topology,
+        nodes: typing.List[str],
+    ) -> int:
+        """
+        Returns the bitset (over the node ids) of the nodes that can manage
+        the given nodes, i.e. the vectorized form of
+        `is_management_resource_available` for all of the nodes at once.
+        """
+        index = topology.index
+        everyone = (1 << len(index)) - 1
+
+        # the nodes that need an additional vnfm must have its resources,
+        # the others have enough capacity on their current vnfms.
+        candidates = (
+            topology.fitting(self.vnfm.cores, self.vnfm.memory)
+            | self.spare(len(nodes))
+        ) & everyone
+
+        # check the not manager nodes constraints
+        for node in nodes:
+            candidates &= ~index.not_managers[index.ids[node]]
+
+        # the nodes within the radius of the manager must contain all of
+        # the nodes, only the remaining candidates are checked.
+        managed = index.mask(nodes)
+        for manager in bits(candidates):
+            ball = topology.reachable(
+                index.names[manager],
+                self.vnfm.bandwidth,
+                max_height=self.vnfm.radius,
+            )
+            if managed & ~ball:
+                candidates &= ~(1 << manager)
+
+        return candidates
+
     @staticmethod
     def is_resource_available(
         topology: Topology,
@@ -177,11 +492,8 @@ class Solver(abc.ABC):
                 return False
 
         if previous != "" and link is not None:
-            if (
-                topology.path(
-                    previous, current, link.bandwidth, max_height=radius
-                )
-                is None
+            if not topology.is_reachable(
+                previous, current, link.bandwidth, max_height=radius
             ):
                 return False
 
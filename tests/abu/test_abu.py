@@ -74,3 +74,90 @@ class TestAbu:
 
         assert len(abu.solution) == 3
         assert abu.cost == 200
+
+        # the tabu search stops on the fewest licenses and its counts
+        # are the ones of the solution.
+        assert abu.iterations < abu.n_iter
+        assert abu.moves >= abu.iterations
+        manage_by_node = {}
+        for _, mp in abu.solution:
+            manage_by_node[mp.management_node] = manage_by_node.get(
+                mp.management_node, 0
+            ) + len(mp.management_links)
+        assert {
+            node: count for node, count in abu.manage_by_node.items() if count
+        } == manage_by_node
+
+
+def config() -> Config:
+    topo = Topology()
+    topo.add_node("s0", Node(0, 0, direction=Direction.BOTH))
+    for s in ("s1", "s2"):
+        topo.add_node(s, Node(0, 0))
+        topo.add_link("s0", s, Link(15))
+        topo.add_link(s, "s0", Link(15))
+    for s, nodes in (("s1", ("n1", "n2", "n3")), ("s2", ("n4", "n5", "n6"))):
+        for n in nodes:
+            topo.add_node(n, Node(6, 6))
+            topo.add_link(s, n, Link(15))
+            topo.add_link(n, s, Link(15))
+
+    fw = Type("fw", 2, 2)
+    ingress = Type("in", 0, 0, Direction.INGRESS, False)
+    egress = Type("out", 0, 0, Direction.EGRESS, False)
+
+    chains = []
+    for c in range(5):
+        ch = Chain(f"ch-{c}", 100)
+        ch.add_function(ingress)
+        ch.add_function(fw)
+        ch.add_function(egress)
+        ch.add_link(0, 1, Link(2))
+        ch.add_link(1, 2, Link(2))
+        chains.append(ch)
+
+    vnfm = VNFM(
+        cores=1, memory=1, capacity=3, radius=100, bandwidth=1, license_cost=100
+    )
+
+    return Config(types=[fw], chains=chains, topology=topo, vnfm=vnfm)
+
+
+class TestMultiStart:
+    def solve(self, starts: int, workers: int) -> Abu:
+        abu = Abu(config())
+        abu.seed = 3
+        abu.starts = starts
+        abu.workers = workers
+        abu.solve()
+        return abu
+
+    def test_multistart(self):
+        serial = self.solve(4, 1)
+        process = self.solve(4, 2)
+
+        # the starts don't depend on where they run
+        assert [
+            (mp.management_node, mp.management_links)
+            for _, mp in serial.solution
+        ] == [
+            (mp.management_node, mp.management_links)
+            for _, mp in process.solution
+        ]
+        assert serial.cost == process.cost == 200
+        assert serial.profit == 500
+        # the counters of the worker searches are added to the solver
+        assert serial.iterations == process.iterations
+        assert serial.moves == process.moves
+
+        # the best managers are applied on the solver
+        manage_by_node = {}
+        for _, mp in process.solution:
+            manage_by_node[mp.management_node] = manage_by_node.get(
+                mp.management_node, 0
+            ) + len(mp.management_links)
+        assert {
+            node: count
+            for node, count in process.manage_by_node.items()
+            if count
+        } == manage_by_node
@@ -0,0 +1,68 @@
+import typing
+
+import pytest
+
+from jsd_mp.domain import Type, Node, Topology, Link, Chain, VNFM, Direction
+from jsd_mp.config import Config
+from jsd_mp.bari import Bari
+
+
+@pytest.fixture
+def config() -> Config:
+    """
+    four chains of two firewalls on two racks of three servers,
+    n1 cannot manage any of the servers.
+    """
+    topo = Topology()
+    topo.add_node("s0", Node(0, 0, direction=Direction.BOTH))
+    topo.add_node("s1", Node(0, 0))
+    topo.add_node("s2", Node(0, 0))
+    for n in ("n1", "n2", "n3", "n4", "n5", "n6"):
+        topo.add_node(n, Node(4, 4, not_manager_nodes=["n1"]))
+    for s in ("s1", "s2"):
+        topo.add_link("s0", s, Link(15))
+        topo.add_link(s, "s0", Link(15))
+    for s, nodes in (("s1", ("n1", "n2", "n3")), ("s2", ("n4", "n5", "n6"))):
+        for n in nodes:
+            topo.add_link(s, n, Link(15))
+            topo.add_link(n, s, Link(15))
+
+    fw = Type("fw", 2, 2)
+    ingress = Type("in", 0, 0, Direction.INGRESS, False)
+    egress = Type("out", 0, 0, Direction.EGRESS, False)
+
+    chains = []
+    for c in range(4):
+        ch = Chain(f"ch-{c}", 100)
+        ch.add_function(ingress)
+        ch.add_function(fw)
+        ch.add_function(fw)
+        ch.add_function(egress)
+        ch.add_link(0, 1, Link(5))
+        ch.add_link(1, 2, Link(5))
+        ch.add_link(2, 3, Link(5))
+        chains.append(ch)
+
+    vnfm = VNFM(
+        cores=2, memory=2, capacity=4, radius=100, bandwidth=1, license_cost=100
+    )
+
+    return Config(types=[fw], chains=chains, topology=topo, vnfm=vnfm)
+
+
+@pytest.fixture
+def solve(config: Config) -> typing.Callable[..., Bari]:
+    """
+    solve the configuration with Bari and the given options, the solvers
+    have the same seed.
+    """
+
+    def solve(**options) -> Bari:
+        bari = Bari(config)
+        bari.seed = 7
+        for option, value in options.items():
+            setattr(bari, option, value)
+        bari.solve()
+        return bari
+
+    return solve
@@ -0,0 +1,38 @@
+from jsd_mp.bari import Bari
+from jsd_mp.config import Config
+
+
+class Options(Bari):
+    """
+    places a chain only with the options of the test, so a worker fails
+    if they aren't forwarded to it.
+    """
+
+    def place(self, chain):
+        assert (self.beam, self.bounded) == (4, 1)
+        return super().place(chain)
+
+
+class TestAdmission:
+    def test_speculative(self, solve):
+        sequential = solve()
+
+        for window in (2, 3):
+            for workers in (1, 2):
+                bari = solve(window=window, workers=workers)
+
+                # the chains are admitted like one by one
+                assert bari.solution == sequential.solution
+                assert bari.cost == sequential.cost
+                assert bari.profit == sequential.profit
+
+    def test_options(self, config: Config, solve):
+        sequential = solve(beam=4, bounded=1)
+
+        bari = Options(config)
+        bari.seed = 7
+        bari.beam, bari.bounded = 4, 1
+        bari.window, bari.workers = 2, 2
+        bari.solve()
+
+        assert bari.solution == sequential.solution
@@ -0,0 +1,137 @@
+import pytest
+
+from jsd_mp.domain import Type, Node, Topology, Link, Chain, VNFM, Placement
+from jsd_mp.config import Config
+from jsd_mp.bari import Bari
+from jsd_mp.bari.assignment import ManagerAssignment
+
+
+class TestManagerAssignment:
+    def test_ejection(self):
+        fw = Type("fw", 1, 1)
+
+        topo = Topology()
+        topo.add_node("s1", Node(1, 1))
+        # m2 cannot manage s2
+        topo.add_node("s2", Node(1, 1, not_manager_nodes=["m2"]))
+        # the managers cannot host an additional vnfm
+        topo.add_node("m1", Node(0, 0))
+        topo.add_node("m2", Node(0, 0))
+        for m in ("m1", "m2"):
+            for s in ("s1", "s2"):
+                topo.add_link(m, s, Link(20))
+                topo.add_link(s, m, Link(20))
+
+        vnfm = VNFM(
+            cores=1,
+            memory=1,
+            capacity=2,
+            radius=1,
+            bandwidth=2,
+            license_cost=1,
+        )
+
+        chains = [Chain("ch-1", 100), Chain("ch-2", 100)]
+        for ch in chains:
+            ch.add_function(fw)
+
+        cfg = Config(types={}, chains=chains, topology=topo, vnfm=vnfm)
+
+        bari = Bari(cfg)
+        # both managers have a vnfm with an empty slot
+        bari.reset_management({"m1": 1, "m2": 1})
+
+        placements = [
+            Placement(chains[0], ["s1"], {}),
+            Placement(chains[1], ["s2"], {}),
+        ]
+        for p in placements:
+            p.apply_on_topology(bari.topology)
+
+        # the greedy manager of ch-1 is the only manager of ch-2
+        mp = bari.place_manager(chains[0], bari.topology, placements[0])
+        assert mp is not None and mp.management_node == "m1"
+
+        # so ch-2 moves ch-1 to m2
+        assignment = ManagerAssignment(bari, placements)
+        managers = assignment.assign()
+        assert [mp.management_node for mp in managers] == ["m2", "m1"]
+        assert [mp.management_links for mp in managers] == [
+            [[("m2", "s1")]],
+            [[("m1", "s2")]],
+        ]
+        assert assignment.ejections == 1
+        assert bari.manage_by_node == {"m1": 2, "m2": 2}
+        assert (bari.licenses, bari.profit) == (2, 200)
+
+        # without the ejections ch-2 doesn't have any manager
+        bari = Bari(cfg)
+        bari.reset_management({"m1": 1, "m2": 1})
+        for p in placements:
+            p.apply_on_topology(bari.topology)
+        managers = ManagerAssignment(bari, placements, depth=0).assign()
+        assert managers[0] is not None and managers[1] is None
+
+    def test_policy(self, config):
+        class Local(Bari):
+            def place_manager(self, chain, topology, placement):
+                return None
+
+        # the batches would ignore the manager policy of the subclass
+        bari = Local(config)
+        bari.batch = 2
+        with pytest.raises(ValueError):
+            bari.solve()
+
+    def test_missing_route(self):
+        fw = Type("fw", 1, 1)
+
+        topo = Topology()
+        # the managers cannot host the functions
+        topo.add_node("m1", Node(1, 1, vnf_support=False))
+        topo.add_node("m2", Node(1, 1, vnf_support=False))
+        for n in ("q", "p", "r"):
+            topo.add_node(n, Node(0, 0))
+        topo.add_node("a", Node(1, 1))
+        # m2 cannot manage b
+        topo.add_node("b", Node(1, 1, not_manager_nodes=["m2"]))
+        # p -> r has the bandwidth of a management route only
+        for source, destination, bandwidth in (
+            ("m1", "q", 10),
+            ("q", "a", 10),
+            ("m1", "p", 10),
+            ("m2", "p", 10),
+            ("p", "r", 1),
+            ("r", "a", 10),
+            ("r", "b", 10),
+        ):
+            topo.add_link(source, destination, Link(bandwidth))
+
+        vnfm = VNFM(
+            cores=1,
+            memory=1,
+            capacity=1,
+            radius=10,
+            bandwidth=1,
+            license_cost=1,
+        )
+
+        chains = [Chain("ch-a", 100), Chain("ch-b", 100)]
+        for ch in chains:
+            ch.add_function(fw)
+
+        cfg = Config(types={}, chains=chains, topology=topo, vnfm=vnfm)
+
+        greedy = Bari(cfg)
+        greedy.solve()
+
+        # ch-b would move ch-a to m2 over p -> r, which its own route
+        # from m1 needs, so the path is rolled back.
+        bari = Bari(cfg)
+        bari.batch = 2
+        bari.solve()
+
+        assert bari.solution == greedy.solution
+        assert [p.chain.name for p, _ in bari.solution] == ["ch-a"]
+        assert bari.manage_by_node == {"m1": 1}
+        assert (bari.licenses, bari.profit) == (1, 100)
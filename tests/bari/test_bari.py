@@ -1,3 +1,5 @@
+import math
+
 from jsd_mp.domain import Type, Node, Topology, Link, Chain, VNFM, Direction
 from jsd_mp.config import Config
 from jsd_mp.bari import Bari
@@ -224,3 +226,60 @@ class TestBari:
         pls = Bari(cfg).solve()
 
         assert len(pls) == 0
+
+    def test_get_costs(self):
+        fw = Type("fw", 2, 2)
+
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2, not_manager_nodes=["s3"]))
+        topo.add_node("s2", Node(1, 1))
+        topo.add_node("s3", Node(2, 2, not_manager_nodes=["s1", "s2"]))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s3", Link(20))
+
+        vnfm = VNFM(2, 2, 2, 2, 2, 2)
+
+        cfg = Config(types=[fw], chains=[], topology=topo, vnfm=vnfm)
+
+        bari = Bari(cfg)
+        link = Link(10)
+
+        # the vectorized costs must agree with the cost function
+        for previous, link in (("", None), ("s1", link), ("s2", link)):
+            costs = bari.get_costs(bari.topology, previous, 0b111, fw, link)
+            assert costs == {
+                j: c
+                for j, n in enumerate(("s1", "s2", "s3"))
+                if (c := bari.get_cost(bari.topology, previous, n, fw, link))
+                != math.inf
+            }
+
+        # s1 cannot be reached from s2
+        assert bari.get_cost(bari.topology, "s2", "s1", fw, link) == math.inf
+        assert 0 not in bari.get_costs(bari.topology, "s2", 0b001, fw, link)
+
+    def test_rank_managers(self):
+        topo = Topology()
+        for n in ("s1", "s2", "s3", "s4"):
+            topo.add_node(n, Node(2, 2))
+        for n in ("s1", "s3", "s4"):
+            topo.add_link(n, "s2", Link(20))
+
+        vnfm = VNFM(2, 2, 2, 1, 2, 2)
+
+        cfg = Config(types=[], chains=[], topology=topo, vnfm=vnfm)
+
+        bari = Bari(cfg)
+        # s4 has a vnfm with an empty slot, so it costs nothing
+        bari.manage_by_node = {"s4": 1}
+
+        assert bari.rank_managers(bari.topology, ["s2"], 3) == [
+            "s4",
+            "s1",
+            "s2",
+        ]
+        assert bari.rank_managers(bari.topology, ["s2", "s2"], 2) == [
+            "s1",
+            "s2",
+        ]
+        assert bari.rank_managers(bari.topology, ["s1"], 3) == ["s1"]
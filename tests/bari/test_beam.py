@@ -0,0 +1,19 @@
+class TestBeam:
+    def test_wide(self, solve):
+        exact = solve()
+
+        # the beam keeps all of the states, so it is exact
+        bari = solve(beam=9)
+
+        assert bari.solution == exact.solution
+        assert bari.cost == exact.cost
+        assert bari.profit == exact.profit
+
+    def test_narrow(self, solve):
+        exact = solve()
+
+        # a state of each stage trades the optimality for the speed
+        bari = solve(beam=1)
+
+        assert 0 < len(bari.solution) <= len(exact.solution)
+        assert bari.profit <= exact.profit
@@ -0,0 +1,61 @@
+from jsd_mp.bari import Bari
+from jsd_mp.domain import Placement
+from jsd_mp.solver import PartialPlacement
+
+
+def last_cost(bari: Bari, p: Placement) -> int:
+    """
+    the cost of the last step of the placement, i.e. the cost of the final
+    stage that the viterbi algorithm minimizes.
+    """
+    chain = p.chain
+    last = len(chain) - 1
+    partial = PartialPlacement(chain).append(p.nodes[0], None)
+    for i in range(1, last):
+        partial.append(p.nodes[i], p.links[(i - 1, i)])
+    return bari.get_cost(
+        partial.apply_on_topology(bari.topology),
+        p.nodes[last - 1],
+        p.nodes[last],
+        chain.functions[last],
+        chain.links[(last - 1, last)],
+    )
+
+
+class TestBounded:
+    def test_bounded(self, config):
+        exact = Bari(config)
+        # the bounded solver places the chains on the state of the exact one
+        bounded = exact.phase(Bari, [])
+        bounded.bounded = 1
+
+        placed = 0
+        for seed, chain in enumerate(config.chains):
+            placements = [exact.place(chain), bounded.place(chain)]
+
+            # the same optimum, but for its ties
+            assert (placements[0] is None) == (placements[1] is None)
+            if placements[0] is not None and placements[1] is not None:
+                assert last_cost(exact, placements[0]) == last_cost(
+                    bounded, placements[1]
+                )
+                placed += 1
+
+            exact.admit(chain, seed)
+
+        assert placed > 0
+
+    def test_final_bounds(self, config):
+        bari = Bari(config)
+        chain = config.chains[0]
+        index = bari.topology.index
+
+        # only s0 can host the egress function, it is two hops away from
+        # both of them, n1 cannot manage them and s0 cannot host a vnfm.
+        n1 = index.ids["n1"]
+        n4 = index.ids["n4"]
+        assert bari.final_bounds(chain, 1 << n1 | 1 << n4) == {
+            n1: 1 + 2 + 100,
+            n4: 1 + 2 + 100,
+        }
+        assert bari.completions(chain)[3] == 1 << index.ids["s0"]
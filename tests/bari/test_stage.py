@@ -0,0 +1,51 @@
+from jsd_mp.bari import Bari
+from jsd_mp.solver import PartialPlacement
+
+
+class TestStage:
+    def test_vectorized(self, solve):
+        serial = solve(stage="serial")
+        vectorized = solve(stage="vectorized")
+
+        # they break the ties in the same order
+        assert [p.nodes for p, _ in serial.solution] == [
+            p.nodes for p, _ in vectorized.solution
+        ]
+        assert [p.links for p, _ in serial.solution] == [
+            p.links for p, _ in vectorized.solution
+        ]
+
+    def test_process(self, solve):
+        first = solve(stage="process", workers=2)
+        second = solve(stage="process", workers=2)
+
+        # the placement doesn't depend on the scheduling of the tasks
+        assert first.solution == second.solution
+
+    def test_costs(self, config):
+        chain = config.chains[0]
+
+        costs = []
+        for stage in ("serial", "process"):
+            bari = Bari(config)
+            bari.stage = stage
+            bari.workers = 2
+
+            applied = {
+                k: PartialPlacement(chain)
+                .append(k, None)
+                .apply_on_topology(bari.topology)
+                for k in ("n1", "n2", "n5")
+            }
+            stage_costs = {
+                j: c
+                for j, (c, _) in bari.evaluate_stage(
+                    chain, 1, applied
+                ).items()
+            }
+            bari.evaluator.close()
+            costs.append(stage_costs)
+
+        # the costs don't depend on the broken ties
+        assert costs[0] == costs[1]
+        assert list(costs[0]) == ["n1", "n2", "n3", "n4", "n5", "n6"]
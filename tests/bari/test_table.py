@@ -0,0 +1,28 @@
+from jsd_mp.bari.table import StateTable
+
+
+class TestStateTable:
+    def test_trace(self):
+        table = StateTable(3, 4)
+
+        table.set(0, 1, 0, -1, None)
+        table.set(0, 2, 1, -1, None)
+        table.set(1, 3, 2, 2, [("s2", "s3")])
+        table.set(2, 0, 4, 3, [("s3", "s1"), ("s1", "s0")])
+
+        assert table.reached == [0b0110, 0b1000, 0b0001]
+        assert table.trace(2, 0) == (
+            [2, 3, 0],
+            [[("s2", "s3")], [("s3", "s1"), ("s1", "s0")]],
+        )
+        assert table.trace(0, 1) == ([1], [])
+
+    def test_reset(self):
+        table = StateTable(2, 2)
+
+        table.set(0, 0, 0, -1, None)
+        table.set(1, 1, 1, 0, [("s0", "s1")])
+        table.reset()
+
+        assert table.reached == [0, 0]
+        assert table.paths == [None] * 4
@@ -0,0 +1,26 @@
+from jsd_mp.config import Config
+from jsd_mp.bari import Bari
+
+
+class TestTemplate:
+    def test_first_stage(self, config):
+        bari = Bari(config)
+        fn = config.chains[0].functions[0]
+        index = bari.topology.index
+
+        # the memoized costs are the costs of the ingress candidates
+        candidates = index.hosts(fn.direction) & bari.topology.fitting(
+            fn.cores, fn.memory
+        )
+        costs = bari.get_costs(bari.topology, "", candidates, fn, None)
+        assert bari.first_stage(config.chains[0]) == costs
+        # the chains have the same shape
+        assert bari.first_stage(config.chains[1]) == costs
+
+        bari.solve()
+
+        # the memoized costs follow the updates of the topology
+        fresh = Bari(Config({}, [], config.vnfm, bari.topology))
+        assert bari.first_stage(config.chains[0]) == fresh.first_stage(
+            config.chains[0]
+        )
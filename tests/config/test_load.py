@@ -35,4 +35,8 @@ def test_laod():
     assert cfg.topology.nodes["server-1"].vnf_support
     assert cfg.topology.nodes["switch-9"].direction == Direction.BOTH
     assert "server-3" in cfg.topology.nodes["server-1"].not_manager_nodes
+    index = cfg.topology.index
+    assert (
+        index.not_managers[index.ids["server-1"]] >> index.ids["server-3"] & 1
+    )
     assert "switch-12" in cfg.topology.connections["server-1"]
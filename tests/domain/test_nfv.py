@@ -1,4 +1,4 @@
-from jsd_mp.domain import Chain, Type
+from jsd_mp.domain import Chain, Type, Link
 
 import pytest
 import dataclasses
@@ -23,3 +23,22 @@ class TestNFV:
         for (i, f), counter in zip(ch, range(len(ch))):
             assert f.name == "fw"
             assert i == counter
+
+    def test_fingerprint(self):
+        chains = []
+        for name, bandwidth, manageable in (
+            ("ch-1", 10, True),
+            ("ch-2", 10, True),
+            ("ch-3", 20, True),
+            ("ch-4", 10, False),
+        ):
+            ch = Chain(name, 100)
+            ch.add_function(Type("fw", 1, 2))
+            ch.add_function(Type("nat", 1, 2, manageable=manageable))
+            ch.add_link(0, 1, Link(bandwidth))
+            chains.append(ch)
+
+        # the names of the chains and their functions don't matter
+        assert chains[0].fingerprint == chains[1].fingerprint
+        assert chains[0].fingerprint != chains[2].fingerprint
+        assert chains[0].fingerprint != chains[3].fingerprint
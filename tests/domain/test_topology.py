@@ -1,4 +1,5 @@
-from jsd_mp.domain import Topology, Node, Link
+from jsd_mp.domain import Topology, Node, Link, Direction
+from jsd_mp.domain.topology import ResidualLayer
 
 import pytest
 import copy
@@ -113,3 +114,301 @@ class TestTopology:
 
         assert topo.connections["elahe"] == ["parham"]
         assert topo.connections["parham"] == []
+
+    def test_index(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(3, 4))
+        topo.add_node("s3", Node(5, 6))
+
+        topo.add_link("s1", "s2", Link(10))
+        topo.add_link("s1", "s3", Link(5))
+        topo.add_link("s3", "s2", Link(7))
+
+        index = topo.index
+        assert index.names == ["s1", "s2", "s3"]
+        assert index.ids["s3"] == 2
+        assert list(index.offsets) == [0, 2, 2, 3]
+        assert list(index.targets) == [1, 2, 1]
+        assert index.link_names == [("s1", "s2"), ("s1", "s3"), ("s3", "s2")]
+
+        assert list(topo.cores) == [1, 3, 5]
+        assert list(topo.memory) == [2, 4, 6]
+        assert list(topo.bandwidth) == [10, 5, 7]
+
+        # residual arrays follow the updates
+        topo.update_node("s2", Node(0, 1))
+        topo.update_link("s1", "s3", Link(1))
+        assert list(topo.cores) == [1, 0, 5]
+        assert list(topo.memory) == [2, 1, 6]
+        assert list(topo.bandwidth) == [10, 1, 7]
+        assert topo.index is index
+
+        # copies share the structure but not the residuals
+        deep_topo = copy.deepcopy(topo)
+        deep_topo.update_link("s1", "s2", Link(0))
+        assert deep_topo.index is index
+        assert topo.path("s1", "s2", 5) == [("s1", "s2")]
+        assert deep_topo.path("s1", "s2", 5) is None
+
+        # adding nodes or links recompiles the topology
+        topo.add_node("s4", Node(1, 1))
+        assert topo.index is not index
+        assert topo.index.ids["s4"] == 3
+
+    def test_path_max_height(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+        topo.add_node("s3", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(10))
+        topo.add_link("s2", "s3", Link(10))
+
+        assert topo.path("s1", "s3", 5, max_height=2) == [
+            ("s1", "s2"),
+            ("s2", "s3"),
+        ]
+        assert topo.path("s1", "s3", 5, max_height=1) is None
+        assert topo.path("s1", "s1", 5, max_height=0) == []
+
+    def test_hop_distance(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+        topo.add_node("s3", Node(1, 2))
+        topo.add_node("s4", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(0))
+        topo.add_link("s2", "s3", Link(10))
+        topo.add_link("s1", "s3", Link(10))
+        topo.add_link("s3", "s4", Link(10))
+
+        assert topo.hop_distance("s1", "s1") == 0
+        assert topo.hop_distance("s1", "s2") == 1
+        assert topo.hop_distance("s1", "s3") == 1
+        assert topo.hop_distance("s1", "s4") == 2
+        assert topo.hop_distance("s2", "s4") == 2
+        assert topo.hop_distance("s4", "s1") is None
+        assert topo.index.reach == [0b1111, 0b1110, 0b1100, 0b1000]
+
+        # distances are structural, so they don't depend on the bandwidth
+        topo.update_link("s1", "s3", Link(0))
+        assert topo.hop_distance("s1", "s4") == 2
+        assert copy.deepcopy(topo).index is topo.index
+
+    def test_is_reachable(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+        topo.add_node("s3", Node(1, 2))
+        topo.add_node("s4", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(10))
+        topo.add_link("s2", "s3", Link(10))
+        topo.add_link("s1", "s3", Link(5))
+        topo.add_link("s3", "s4", Link(10))
+
+        assert topo.is_reachable("s1", "s4", 10)
+        assert topo.is_reachable("s1", "s4", 5, max_height=2)
+        assert not topo.is_reachable("s1", "s4", 10, max_height=2)
+        assert not topo.is_reachable("s4", "s1", 1)
+
+        # the oracle follows the residual bandwidth in both directions
+        topo.update_link("s2", "s3", Link(4))
+        assert not topo.is_reachable("s1", "s4", 10)
+        assert topo.is_reachable("s1", "s4", 5)
+        assert topo.path("s1", "s4", 5) == [("s1", "s3"), ("s3", "s4")]
+
+        topo.update_link("s2", "s3", Link(10))
+        assert topo.is_reachable("s1", "s4", 10)
+
+        # changes that don't cross the required bandwidth keep the labels
+        topo.update_link("s3", "s4", Link(12))
+        assert topo.is_reachable("s1", "s4", 10)
+        assert not topo.is_reachable("s1", "s4", 12)
+        assert topo.is_reachable("s3", "s4", 12)
+
+    def test_overlay(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+        topo.add_node("s3", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(10))
+        topo.add_link("s2", "s3", Link(10))
+        topo.add_link("s1", "s3", Link(5))
+
+        overlay = topo.overlay()
+        overlay.update_node("s2", Node(0, 0))
+        overlay.update_link("s1", "s2", Link(2))
+
+        # updates are recorded on the overlay and lookups fall through
+        assert overlay.nodes["s2"].cores == 0
+        assert overlay.nodes["s1"].cores == 1
+        assert overlay.links[("s1", "s2")].bandwidth == 2
+        assert overlay.links[("s2", "s3")].bandwidth == 10
+        assert len(overlay.nodes) == 3
+        assert overlay.path("s1", "s3", 6) is None
+        assert overlay.path("s1", "s3", 2) == [("s1", "s3")]
+        assert list(overlay.cores) == [1, 0, 1]
+        assert overlay.index is topo.index
+
+        # the base topology is untouched
+        assert topo.nodes["s2"].cores == 1
+        assert topo.links[("s1", "s2")].bandwidth == 10
+        assert topo.path("s1", "s3", 6) == [("s1", "s2"), ("s2", "s3")]
+
+        # overlays can be layered
+        layer = overlay.overlay()
+        layer.update_link("s1", "s3", Link(0))
+        assert layer.path("s1", "s3", 1) == [("s1", "s2"), ("s2", "s3")]
+        assert overlay.path("s1", "s3", 1) == [("s1", "s3")]
+        assert list(layer.bandwidth) == [2, 0, 10]
+
+        # the overlay keeps only its own entries over the base arrays
+        cores, _, bandwidth = overlay.residuals()
+        assert isinstance(bandwidth, ResidualLayer)
+        assert bandwidth.base is topo.bandwidth
+        assert bandwidth.layer == {0: 2}
+        assert isinstance(cores, ResidualLayer) and cores.layer == {1: 0}
+
+        # the labels of the base hold unless an updated link changes them
+        assert overlay.label("s1", 2) == topo.label("s1", 2)
+        assert overlay.reachable("s1", 6) == 0b001
+        assert overlay.reachable("s2", 6) == topo.reachable("s2", 6)
+        overlay.update_link("s1", "s2", Link(10))
+        assert overlay.reachable("s1", 6) == 0b111
+
+        with pytest.raises(ValueError):
+            overlay.add_node("s4", Node(1, 2))
+
+    def test_transaction(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(10))
+
+        topo.begin()
+        topo.update_node("s1", Node(0, 0))
+        topo.update_link("s1", "s2", Link(2))
+        assert topo.path("s1", "s2", 5) is None
+        topo.rollback()
+
+        assert topo.nodes["s1"].cores == 1
+        assert list(topo.cores) == [1, 1]
+        assert topo.links[("s1", "s2")].bandwidth == 10
+        assert topo.path("s1", "s2", 5) == [("s1", "s2")]
+
+        # nested transactions are undone by their parent
+        topo.begin()
+        topo.update_node("s1", Node(0, 0))
+        topo.begin()
+        topo.update_node("s2", Node(0, 0))
+        topo.commit()
+        topo.begin()
+        topo.update_link("s1", "s2", Link(0))
+        topo.rollback()
+        assert topo.nodes["s2"].cores == 0
+        assert topo.links[("s1", "s2")].bandwidth == 10
+        topo.rollback()
+
+        assert topo.nodes["s1"].cores == 1
+        assert topo.nodes["s2"].cores == 1
+
+        topo.begin()
+        topo.update_node("s2", Node(0, 0))
+        topo.commit()
+        assert topo.nodes["s2"].cores == 0
+
+    def test_copy(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2))
+        topo.add_node("s2", Node(1, 2))
+
+        topo.add_link("s1", "s2", Link(10))
+
+        copy_topo = topo.copy()
+        copy_topo.update_node("s1", Node(0, 0))
+        copy_topo.update_link("s1", "s2", Link(0))
+
+        assert copy_topo.index is topo.index
+        assert topo.nodes["s1"].cores == 1
+        assert topo.path("s1", "s2", 5) == [("s1", "s2")]
+        assert copy_topo.path("s1", "s2", 5) is None
+
+    def test_not_managers(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(1, 2, not_manager_nodes=["s2", "s3"]))
+        topo.add_node("s2", Node(1, 2, not_manager_nodes=["s4", "s1"]))
+        topo.add_node("s3", Node(1, 2))
+
+        index = topo.index
+        assert index.not_managers[0] == 0b110
+        # s4 isn't a node of the topology so it has an id after the nodes
+        assert index.not_managers[1] == 0b1001
+        assert index.not_managers[2] == 0
+        assert (index.not_managers[0] | index.not_managers[1]).bit_count() == 4
+
+    def test_fitting(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(2, 2, direction=Direction.INGRESS))
+        topo.add_node("s2", Node(4, 4, vnf_support=False))
+        topo.add_node("s3", Node(4, 1, direction=Direction.EGRESS))
+        topo.add_node("s4", Node(4, 4, direction=Direction.BOTH))
+        topo.add_link("s1", "s2", Link(20))
+
+        index = topo.index
+        assert index.hosts(Direction.INGRESS) == 0b1001
+        assert index.hosts(Direction.EGRESS) == 0b1100
+        assert index.hosts(Direction.BOTH) == 0b1101
+
+        assert topo.fitting(2, 2) == 0b1011
+        assert topo.fitting(4, 2) == 0b1010
+
+        # the cached masks follow the residual resources
+        topo.update_node("s4", Node(1, 1, direction=Direction.BOTH))
+        assert topo.fitting(2, 2) == 0b0011
+
+        overlay = topo.overlay()
+        overlay.update_node("s1", Node(0, 0, direction=Direction.INGRESS))
+        assert overlay.fitting(2, 2) == 0b0010
+        assert topo.fitting(2, 2) == 0b0011
+
+    def test_epoch(self):
+        topo = Topology()
+
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2))
+        topo.add_node("s3", Node(2, 2))
+        topo.compile()
+
+        epoch = topo.epoch
+        assert topo.changed(epoch) == 0
+
+        topo.begin()
+        topo.update_node("s3", Node(1, 1))
+        assert topo.changed(epoch) == 0b100
+        topo.rollback()
+
+        # the rollback is an update too
+        assert topo.changed(epoch) == 0b100
+        assert topo.changed(topo.epoch) == 0
+
+        # every update advances the epoch, even of the same node
+        since = topo.epoch
+        for cores in range(100):
+            topo.update_node("s1", Node(cores, 2))
+        assert topo.epoch == since + 100
+        assert topo.changed(since + 99) == 0b001
+        assert topo.changed(epoch) == 0b101
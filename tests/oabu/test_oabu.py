@@ -0,0 +1,53 @@
+from jsd_mp.domain import (
+    Type,
+    Node,
+    Topology,
+    Link,
+    Chain,
+    VNFM,
+    Placement,
+)
+from jsd_mp.config import Config
+from jsd_mp.oabu import Oabu
+
+
+class TestOabu:
+    def test_place_manager(self):
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(0, 0, not_manager_nodes=["s3"]))
+        topo.add_node("s3", Node(2, 2))
+        topo.add_node("s4", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s1", Link(20))
+        topo.add_link("s3", "s2", Link(20))
+        topo.add_link("s4", "s1", Link(20))
+
+        fw = Type("fw", 2, 2)
+        ch = Chain("ch-1", 100)
+        ch.add_function(fw)
+        ch.add_function(fw)
+        ch.add_link(0, 1, Link(1))
+
+        vnfm = VNFM(
+            cores=1, memory=1, capacity=2, radius=2, bandwidth=2, license_cost=1
+        )
+
+        cfg = Config(types={}, chains=[ch], topology=topo, vnfm=vnfm)
+
+        oabu = Oabu(cfg)
+        placement = Placement(ch, ["s1", "s2"], {(0, 1): [("s1", "s2")]})
+        placement.apply_on_topology(oabu.topology)
+
+        # the chain nodes cannot host a vnfm and s3 cannot manage s2
+        mp = oabu.place_manager(ch, oabu.topology, placement)
+        assert mp is not None
+        assert mp.management_node == "s4"
+        assert mp.management_links == [
+            [("s4", "s1")],
+            [("s4", "s1"), ("s1", "s2")],
+        ]
+
+        # there isn't any eligible manager
+        oabu.topology.update_node("s4", Node(0, 0))
+        assert oabu.place_manager(ch, oabu.topology, placement) is None
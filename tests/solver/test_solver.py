@@ -1,4 +1,5 @@
 import random
+import time
 from unittest.mock import patch
 
 from jsd_mp.domain import (
@@ -8,6 +9,8 @@ from jsd_mp.domain import (
     Link,
     Chain,
     VNFM,
+    ManagementPlacement,
+    Placement,
 )
 from jsd_mp.config import Config
 from jsd_mp.solver import Random
@@ -114,6 +117,249 @@ class TestSolver:
         )
 
 
+    def test_management_resource_availability_4(self):
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2))
+        topo.add_node("s3", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s3", Link(20))
+
+        vnfm = VNFM(
+            cores=2,
+            radius=2,
+            memory=2,
+            bandwidth=2,
+            license_cost=2,
+            capacity=2,
+        )
+
+        cfg = Config(types={}, chains=[], topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        assert solver.is_management_resource_available(
+            topology=solver.topology, manager="s1", nodes=["s2", "s3"]
+        )
+
+        # reject when a link doesn't have the management bandwidth anymore
+        solver.topology.update_link("s2", "s3", Link(1))
+        assert not solver.is_management_resource_available(
+            topology=solver.topology, manager="s1", nodes=["s2", "s3"]
+        )
+        assert solver.is_management_resource_available(
+            topology=solver.topology, manager="s1", nodes=["s2"]
+        )
+
+        solver.topology.update_link("s2", "s3", Link(2))
+        assert solver.is_management_resource_available(
+            topology=solver.topology, manager="s1", nodes=["s2", "s3"]
+        )
+
+    def test_eligible_managers(self):
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2, not_manager_nodes=["s4"]))
+        topo.add_node("s3", Node(1, 1))
+        topo.add_node("s4", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s3", Link(20))
+        topo.add_link("s3", "s2", Link(20))
+        topo.add_link("s4", "s2", Link(20))
+        topo.add_link("s4", "s3", Link(1))
+
+        vnfm = VNFM(
+            cores=2,
+            radius=2,
+            memory=2,
+            bandwidth=2,
+            license_cost=2,
+            capacity=2,
+        )
+
+        cfg = Config(types={}, chains=[], topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        for nodes in (["s2"], ["s2", "s3"], ["s3"], ["s3", "s3"], []):
+            for counts in ({}, {"s3": 1}, {"s3": 2}):
+                solver.reset_management(counts)
+                expected = 0
+                for i, manager in enumerate(solver.topology.nodes):
+                    if solver.is_management_resource_available(
+                        solver.topology, manager, nodes
+                    ):
+                        expected |= 1 << i
+                assert (
+                    solver.eligible_managers(solver.topology, nodes)
+                    == expected
+                )
+
+        solver.reset_management({"s3": 1})
+        # s3 has a vnfm with an empty slot and s4 cannot manage s2
+        assert solver.eligible_managers(solver.topology, ["s3"]) == 0b1111
+        assert solver.eligible_managers(solver.topology, ["s2"]) == 0b0111
+
+        # the maintained eligible managers of a chain follow the counts
+        # and the residual resources
+        ch = Chain("ch-1", 100)
+        for counts in ({}, {"s3": 1}, {"s3": 2}):
+            solver.reset_management(counts)
+            for nodes in (["s2"], ["s3"]):
+                assert solver.eligible.get(
+                    ch, nodes
+                ) == solver.eligible_managers(solver.topology, nodes)
+        solver.manage("s3", -1)
+        assert solver.eligible.get(ch, ["s3"]) == 0b1111
+        solver.topology.update_node("s1", Node(1, 1))
+        assert solver.eligible.get(ch, ["s3"]) == 0b1110
+
+        # s4 doesn't reach s3 anymore
+        updates = solver.eligible.updates
+        assert solver.eligible.get(ch, ["s3"]) == 0b1110
+        assert solver.eligible.updates == updates
+        solver.topology.update_link("s4", "s2", Link(1))
+        assert solver.eligible.get(ch, ["s3"]) == 0b0110
+        assert solver.eligible.updates == updates + 1
+
+    def test_transaction(self):
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+
+        fw = Type("fw", 1, 1)
+        ch = Chain("ch-1", 100)
+        ch.add_function(fw)
+
+        vnfm = VNFM(
+            cores=1,
+            radius=2,
+            memory=1,
+            bandwidth=2,
+            license_cost=2,
+            capacity=2,
+        )
+
+        cfg = Config(types={}, chains=[], topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        mp = ManagementPlacement(ch, vnfm, "s1", [[("s1", "s2")]])
+
+        solver.begin()
+        solver.apply_management(mp)
+        assert solver.manage_by_node == {"s1": 1}
+        assert solver.topology.links[("s1", "s2")].bandwidth == 18
+        solver.rollback()
+
+        assert solver.manage_by_node == {}
+        assert solver.topology.nodes["s1"].cores == 2
+        assert solver.topology.links[("s1", "s2")].bandwidth == 20
+
+        solver.begin()
+        solver.apply_management(mp)
+        solver.commit()
+
+        assert solver.manage_by_node == {"s1": 1}
+        assert solver.topology.nodes["s1"].cores == 1
+        # the configuration topology is untouched
+        assert cfg.topology.nodes["s1"].cores == 2
+
+    def test_objective(self):
+        topo = Topology()
+        topo.add_node("s1", Node(4, 4))
+        topo.add_node("s2", Node(4, 4))
+        topo.add_link("s1", "s2", Link(20))
+
+        fw = Type("fw", 1, 1)
+        ch = Chain("ch-1", 100)
+        ch.add_function(fw)
+        ch.add_function(fw)
+        ch.add_link(0, 1, Link(1))
+
+        vnfm = VNFM(
+            cores=1,
+            radius=2,
+            memory=1,
+            bandwidth=2,
+            license_cost=3,
+            capacity=3,
+        )
+
+        cfg = Config(types={}, chains=[], topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        mp = ManagementPlacement(
+            ch, vnfm, "s1", [[("s1", "s2")], [("s1", "s2")]]
+        )
+
+        assert solver.license_delta("s1", 2) == 1
+        solver.apply_management(mp)
+        assert (solver.licenses, solver.cost, solver.profit) == (1, 3, 100)
+        assert solver.license_delta("s1", 1) == 0
+        assert solver.license_delta("s1", 2) == 1
+
+        solver.begin()
+        solver.apply_management(mp)
+        assert (solver.licenses, solver.cost, solver.profit) == (2, 6, 200)
+        solver.rollback()
+        assert (solver.licenses, solver.cost, solver.profit) == (1, 3, 100)
+
+        solver.revert_management(mp)
+        assert (solver.licenses, solver.cost, solver.profit) == (0, 0, 0)
+
+        solver.reset_management({"s1": 4, "s2": 1})
+        assert solver.cost == 9
+
+    def test_consolidate(self):
+        fw = Type("fw", 1, 1)
+
+        topo = Topology()
+        topo.add_node("s1", Node(4, 4))
+        for node in ("s2", "s3", "s4"):
+            topo.add_node(node, Node(2, 2))
+            topo.add_link(node, "s1", Link(20))
+            topo.add_link("s1", node, Link(20))
+
+        vnfm = VNFM(
+            cores=1,
+            memory=1,
+            capacity=4,
+            radius=1,
+            bandwidth=2,
+            license_cost=3,
+        )
+
+        chains = []
+        for i in range(3):
+            ch = Chain(f"ch-{i + 1}", 100)
+            ch.add_function(fw)
+            chains.append(ch)
+
+        cfg = Config(types={}, chains=chains, topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        # each chain has its own manager, i.e. three licenses
+        for ch, manager in zip(chains, ("s2", "s3", "s4")):
+            p = Placement(ch, ["s1"], {})
+            p.apply_on_topology(solver.topology)
+            mp = ManagementPlacement(ch, vnfm, manager, [[(manager, "s1")]])
+            solver.apply_management(mp)
+            solver.solution.append((p, mp))
+        assert (solver.licenses, solver.cost) == (3, 9)
+
+        # the least filled managers are emptied into the best fit
+        solution = solver.consolidate()
+        assert [mp.management_node for _, mp in solution] == ["s3"] * 3
+        assert [mp.management_links for _, mp in solution] == [
+            [[("s3", "s1")]]
+        ] * 3
+        assert solver.manage_by_node == {"s2": 0, "s3": 3, "s4": 0}
+        assert (solver.licenses, solver.cost, solver.profit) == (1, 3, 300)
+
+        # a single license cannot be released
+        assert solver.consolidate() == solution
+        assert solver.licenses == 1
+
+
 class TestRandomSolver:
     def test_not_available_resources(self):
         fw = Type("fw", 2, 2)
@@ -142,8 +388,9 @@ class TestRandomSolver:
 
         cfg = Config(types={"fw": fw}, chains=[ch], topology=topo, vnfm=vnfm)
 
-        random.seed(a=1378)
-        pls = Random(cfg).solve()
+        solver = Random(cfg)
+        solver.seed = 1378
+        pls = solver.solve()
 
         assert len(pls) == 0
 
@@ -170,8 +417,9 @@ class TestRandomSolver:
 
         cfg = Config(types={"fw": fw}, chains=[ch], topology=topo, vnfm=vnfm)
 
-        random.seed(a=1378)
-        pls = Random(cfg).solve()
+        solver = Random(cfg)
+        solver.seed = 1378
+        pls = solver.solve()
 
         assert len(pls) == 1
 
@@ -185,3 +433,96 @@ class TestRandomSolver:
         }
 
         assert pls[0][1].management_node == "s3"
+
+    def test_seed(self):
+        fw = Type("fw", 1, 1)
+
+        chains = []
+        for c in range(4):
+            ch = Chain(f"ch-{c}", 100)
+            ch.add_function(fw)
+            ch.add_function(fw)
+            ch.add_link(0, 1, Link(1))
+            chains.append(ch)
+
+        topo = Topology()
+        for n in ("s1", "s2", "s3", "s4"):
+            topo.add_node(n, Node(4, 4))
+        for a in ("s1", "s2", "s3", "s4"):
+            for b in ("s1", "s2", "s3", "s4"):
+                if a != b:
+                    topo.add_link(a, b, Link(20))
+
+        vnfm = VNFM(1, 1, 2, 2, 2, 2)
+
+        cfg = Config(types={"fw": fw}, chains=chains, topology=topo, vnfm=vnfm)
+
+        solutions = []
+        for state in (1, 2):
+            # the seeded solver doesn't draw from the random module
+            random.seed(state)
+            solver = Random(cfg)
+            solver.seed = 5
+            solutions.append(solver.solve())
+        assert solutions[0] == solutions[1]
+
+    def test_phase(self):
+        fw = Type("fw", 1, 1)
+
+        ch = Chain("ch-1", 100)
+        ch.add_function(fw)
+
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s1", Link(20))
+
+        vnfm = VNFM(1, 1, 2, 2, 2, 2)
+
+        cfg = Config(types={"fw": fw}, chains=[ch], topology=topo, vnfm=vnfm)
+
+        solver = MockSolver(cfg)
+        phase = solver.phase(Random, [ch])
+        assert phase.topology is solver.topology
+        assert phase.manage_by_node is solver.manage_by_node
+        assert phase.rng is solver.rng
+
+        ((p, mp),) = phase.solve()
+        solver.adopt(phase)
+
+        assert solver.manage_by_node == {mp.management_node: 1}
+        assert (solver.cost, solver.profit) == (2, 100)
+        assert solver.topology.nodes[p.nodes[0]].cores < 2
+
+        # the counts are replaced in place, so they are still shared
+        spare = solver.spare(1)
+        solver.reset_management({mp.management_node: 2})
+        assert phase.manage_by_node is solver.manage_by_node
+        assert phase.spare(1) == solver.spare(1) != spare
+
+    def test_deadline(self):
+        fw = Type("fw", 1, 1)
+
+        ch = Chain("ch-1", 100)
+        ch.add_function(fw)
+
+        topo = Topology()
+        topo.add_node("s1", Node(2, 2))
+        topo.add_node("s2", Node(2, 2))
+        topo.add_link("s1", "s2", Link(20))
+        topo.add_link("s2", "s1", Link(20))
+
+        vnfm = VNFM(1, 1, 2, 2, 2, 2)
+
+        cfg = Config(types={"fw": fw}, chains=[ch], topology=topo, vnfm=vnfm)
+
+        solver = Random(cfg)
+        assert solver.solve(deadline=time.monotonic()) == []
+        assert solver.deadline_hit is True
+        assert solver.progress == 0.0
+
+        solver = Random(cfg)
+        assert len(solver.solve(deadline=time.monotonic() + 60)) == 1
+        assert solver.deadline_hit is False
+        assert solver.progress == 1.0
@@ -0,0 +1,15 @@
+import pytest
+
+from jsd_mp.main import parse
+
+
+class TestMain:
+    def test_parse(self):
+        assert parse(0, "8") == 8
+        assert parse("vectorized", "process") == "process"
+        assert parse(None, "8") == "8"
+        assert parse(True, "False") is False
+        assert parse(False, "true") is True
+        assert parse(False, "1") is True
+        with pytest.raises(ValueError):
+            parse(False, "maybe")